@@ -1,9 +1,9 @@
 #!/usr/bin/env python3
 """Audit the dataset for orphan nodes and missing connections."""
-import json
+from citations import CitationTable
+from snapshot_format import read_dataset
 
-with open("../frontend/src/data/mvp_dataset.json") as f:
-    data = json.load(f)
+data = read_dataset("../frontend/src/data/mvp_dataset.json")
 
 nodes = {n["id"]: n["label"] for n in data["nodes"]}
 foods = {n["id"]: n["label"] for n in data["nodes"] if n["type"] == "food"}
@@ -35,6 +35,7 @@ for bid, label in sorted(orphan_bios.items()):
 cite_count = sum(len(l.get("citations", [])) for l in data["links"])
 links_without_cites = sum(1 for l in data["links"] if not l.get("citations"))
 print(f"\nTotal citations: {cite_count}")
+print(f"Distinct papers: {CitationTable(data['links']).paper_count}")
 print(f"Links without citations: {links_without_cites}")
 
 # Print all node IDs for reference
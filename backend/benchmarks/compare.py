@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""Compare two benchmark result files and fail on regressions.
+
+    python -m benchmarks.compare baseline.json current.json --threshold 0.25
+
+A case regresses when its p50 latency at some size grew by more than
+``--threshold`` (a fraction), or when its scaling exponent grew by more than
+``--exponent-threshold``. Exits with status 1 if anything regressed.
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+
+def load(path: str) -> dict:
+    return json.loads(Path(path).read_text(encoding="utf-8"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark runs")
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed relative p50 slowdown")
+    parser.add_argument("--exponent-threshold", type=float, default=0.3, help="Allowed growth of the scaling exponent")
+    args = parser.parse_args()
+
+    baseline, current = load(args.baseline), load(args.current)
+    before = {(row["case"], row["size"]): row for row in baseline["results"]}
+    regressions = []
+
+    for row in current["results"]:
+        old = before.get((row["case"], row["size"]))
+        if old is None or not old["p50_ms"]:
+            continue
+        change = row["p50_ms"] / old["p50_ms"] - 1
+        flag = change > args.threshold
+        if flag:
+            regressions.append(f"{row['case']} @ {row['size']}: p50 {old['p50_ms']:.3f} -> {row['p50_ms']:.3f} ms")
+        print(f"{'REGRESSED' if flag else 'ok':<10} {row['case']:<22} {row['size']:>9}  p50 {old['p50_ms']:>9.3f} -> {row['p50_ms']:>9.3f} ms ({change:+.1%})")
+
+    for case, exponent in sorted(current.get("scaling", {}).items()):
+        old = baseline.get("scaling", {}).get(case)
+        if old is not None and exponent - old > args.exponent_threshold:
+            regressions.append(f"{case}: scaling n^{old:.2f} -> n^{exponent:.2f}")
+
+    if regressions:
+        print("\nRegressions:")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+    print("\nNo regressions.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""A fake OpenAI-compatible chat completions server for exercising ingestion.
+
+    python -m benchmarks.fake_openai --port 8400 --latency-ms 300 --error-rate 0.1
+    OPENAI_BASE_URL=http://127.0.0.1:8400/v1 OPENAI_API_KEY=test python ingest_batch.py papers/
+
+POST /v1/chat/completions answers extraction requests (``response_format``
+json_object) with a few relationships derived from the text and anything
+else with a short summary, after ``--latency-ms`` (+/- 50% jitter). A
+``--error-rate`` share of requests get a 429 with Retry-After or a 500, and
+requests beyond ``--rpm`` in a rolling minute get a 429. Every response
+reports token usage. GET /stats returns request counters.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import time
+from collections import deque
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+FOODS = ("Oats", "Salmon", "Walnuts", "Spinach", "Blueberries", "Lentils")
+BIOMARKERS = ("LDL Cholesterol", "HbA1c", "CRP", "Triglycerides", "Ferritin")
+
+
+def create_app(latency: float = 0.3, error_rate: float = 0.0, rpm: float | None = None, seed: int = 0) -> FastAPI:
+    app = FastAPI()
+    rng = random.Random(seed)
+    recent: deque[float] = deque()
+    stats = {"requests": 0, "completed": 0, "rate_limited": 0, "errors": 0, "max_in_flight": 0}
+    in_flight = 0
+
+    def usage(messages, content: str) -> dict:
+        prompt = sum(len(message.get("content") or "") for message in messages) // 4
+        completion = len(content) // 4
+        return {"prompt_tokens": prompt, "completion_tokens": completion, "total_tokens": prompt + completion}
+
+    def extraction(text: str) -> str:
+        digest = hashlib.sha256(text.encode("utf-8")).digest()
+        return json.dumps({
+            "relationships": [
+                {
+                    "food": FOODS[digest[i] % len(FOODS)],
+                    "biomarker": BIOMARKERS[digest[i + 8] % len(BIOMARKERS)],
+                    "effect_direction": ("Increase", "Decrease")[digest[i + 16] % 2],
+                    "magnitude": f"-{digest[i + 24] % 20}%",
+                    "study_type": "RCT",
+                }
+                for i in range(1 + digest[31] % 4)
+            ]
+        })
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        nonlocal in_flight
+        body = await request.json()
+        stats["requests"] += 1
+        now = time.monotonic()
+        while recent and now - recent[0] > 60:
+            recent.popleft()
+        if rpm is not None and len(recent) >= rpm:
+            stats["rate_limited"] += 1
+            retry_after = max(0.0, 60 - (now - recent[0]))
+            return JSONResponse({"error": {"message": "Rate limit reached", "type": "requests"}}, status_code=429, headers={"Retry-After": f"{retry_after:.2f}"})
+        recent.append(now)
+
+        in_flight += 1
+        stats["max_in_flight"] = max(stats["max_in_flight"], in_flight)
+        try:
+            await asyncio.sleep(latency * rng.uniform(0.5, 1.5))
+        finally:
+            in_flight -= 1
+        if rng.random() < error_rate:
+            if rng.random() < 0.5:
+                stats["rate_limited"] += 1
+                return JSONResponse({"error": {"message": "Rate limit reached", "type": "tokens"}}, status_code=429, headers={"Retry-After": "0.2"})
+            stats["errors"] += 1
+            return JSONResponse({"error": {"message": "Internal error", "type": "server_error"}}, status_code=500)
+
+        messages = body.get("messages", [])
+        user = next((m.get("content") or "" for m in reversed(messages) if m.get("role") == "user"), "")
+        if (body.get("response_format") or {}).get("type") == "json_object":
+            content = extraction(user)
+        else:
+            content = f"Fake summary: {' '.join(user.split())[:120]}"
+        stats["completed"] += 1
+        return {
+            "id": f"chatcmpl-{stats['requests']}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "fake"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": usage(messages, content),
+        }
+
+    @app.get("/stats")
+    async def get_stats():
+        return stats
+
+    return app
+
+
+def cli():
+    parser = argparse.ArgumentParser(description="Fake OpenAI-compatible chat completions server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8400)
+    parser.add_argument("--latency-ms", type=float, default=300)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with a 429 or 500")
+    parser.add_argument("--rpm", type=float, default=None, help="Answer 429 beyond this many requests per minute")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    uvicorn.run(create_app(args.latency_ms / 1000, args.error_rate, args.rpm, args.seed), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""HTTP load generator that replays the frontend's traffic.
+
+    python -m benchmarks.loadtest --start-server --workers 2 --users 50 --duration 30
+    python -m benchmarks.loadtest --url http://localhost:8000 --rate 20 --users 200
+
+Scenarios mirror what the pages do:
+
+* ``page_view``: a page navigation; every page (Dashboard, FoodIndex,
+  GraphExplorer, Recommendations, ResearchPapers, BiomarkerList) fetches
+  /graph. Repeat views revalidate with If-None-Match like a browser cache.
+* ``hud_click``: clicking nodes, GET /node/{id}.
+* ``search``: typing a label, one /search per keystroke.
+
+Each virtual user keeps one keep-alive connection and runs sessions (a page
+view, some HUD clicks, maybe a search) with short think times. Without
+``--rate`` the users run closed-loop; with it, sessions start at that many
+per second and ``--users`` caps how many run at once. The client is a
+minimal HTTP/1.1 implementation on asyncio streams, so the numbers include
+every byte on the wire and nothing beyond the standard library is needed.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import time
+from pathlib import Path
+from urllib.parse import quote, urlsplit
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+ACCEPT_ENCODING = "gzip, deflate, br"
+
+
+class Connection:
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.reader = self.writer = None
+
+    async def request(self, path: str, headers: dict | None = None) -> tuple[int, dict, bytes, int]:
+        """GET ``path``; returns status, headers, body and bytes received."""
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        lines = [f"GET {path} HTTP/1.1", f"Host: {self.host}:{self.port}"]
+        lines += [f"{name}: {value}" for name, value in (headers or {}).items()]
+        self.writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+        await self.writer.drain()
+
+        head = await self.reader.readuntil(b"\r\n\r\n")
+        received = len(head)
+        status_line, *header_lines = head.decode("latin-1").split("\r\n")
+        status = int(status_line.split(" ", 2)[1])
+        response_headers = {}
+        for line in header_lines:
+            if line:
+                name, _, value = line.partition(":")
+                response_headers[name.strip().lower()] = value.strip()
+
+        if response_headers.get("transfer-encoding", "").lower() == "chunked":
+            body = bytearray()
+            while True:
+                size_line = await self.reader.readuntil(b"\r\n")
+                size = int(size_line.split(b";")[0], 16)
+                chunk = await self.reader.readexactly(size + 2)
+                received += len(size_line) + len(chunk)
+                body += chunk[:-2]
+                if size == 0:
+                    break
+            body = bytes(body)
+        else:
+            body = await self.reader.readexactly(int(response_headers.get("content-length", 0)))
+            received += len(body)
+
+        if response_headers.get("connection", "").lower() == "close":
+            await self.close()
+        return status, response_headers, body, received
+
+    async def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except OSError:
+                pass
+        self.reader = self.writer = None
+
+
+class Stats:
+    def __init__(self):
+        self.latencies: dict[str, list[float]] = {}
+        self.errors: dict[str, int] = {}
+        self.bytes = 0
+        self.sessions = 0
+        # Open-loop arrivals skipped because every user was busy; no request was sent.
+        self.dropped_sessions = 0
+
+    def record(self, name: str, seconds: float, received: int, ok: bool) -> None:
+        self.latencies.setdefault(name, []).append(seconds)
+        self.bytes += received
+        if not ok:
+            self.errors[name] = self.errors.get(name, 0) + 1
+
+    def report(self, elapsed: float) -> dict:
+        def percentile(values: list[float], p: float) -> float:
+            return values[min(len(values) - 1, math.ceil(p * len(values)) - 1)] * 1000
+
+        endpoints = {}
+        for name, values in sorted(self.latencies.items()):
+            values.sort()
+            endpoints[name] = {
+                "requests": len(values),
+                "errors": self.errors.get(name, 0),
+                "p50_ms": percentile(values, 0.50),
+                "p95_ms": percentile(values, 0.95),
+                "p99_ms": percentile(values, 0.99),
+            }
+        requests = sum(len(values) for values in self.latencies.values())
+        return {
+            "elapsed_s": elapsed,
+            "sessions": self.sessions,
+            "dropped_sessions": self.dropped_sessions,
+            "requests": requests,
+            "errors": sum(self.errors.values()),
+            "requests_per_sec": requests / elapsed if elapsed else 0.0,
+            "bytes": self.bytes,
+            "endpoints": endpoints,
+        }
+
+
+class User:
+    def __init__(self, host: str, port: int, stats: Stats, catalog: dict, rng: random.Random, think: float):
+        self.connection = Connection(host, port)
+        self.stats = stats
+        self.catalog = catalog
+        self.rng = rng
+        self.think = think
+        self.graph_etag = None
+
+    async def get(self, name: str, path: str, headers: dict | None = None) -> None:
+        start = time.perf_counter()
+        try:
+            status, response_headers, _, received = await self.connection.request(path, headers)
+        except (OSError, asyncio.IncompleteReadError, ValueError):
+            await self.connection.close()
+            self.stats.record(name, time.perf_counter() - start, 0, False)
+            return
+        self.stats.record(name, time.perf_counter() - start, received, status < 400)
+        if name == "page_view" and status == 200:
+            self.graph_etag = response_headers.get("etag")
+
+    async def pause(self, scale: float = 1.0) -> None:
+        if self.think:
+            await asyncio.sleep(self.rng.expovariate(1 / (self.think * scale)))
+
+    async def page_view(self) -> None:
+        headers = {"Accept-Encoding": ACCEPT_ENCODING}
+        if self.graph_etag:
+            headers["If-None-Match"] = self.graph_etag
+        await self.get("page_view", "/graph", headers)
+
+    async def hud_click(self) -> None:
+        node_id = self.rng.choice(self.catalog["ids"])
+        await self.get("hud_click", f"/node/{quote(node_id, safe='')}", {"Accept-Encoding": ACCEPT_ENCODING})
+
+    async def search(self) -> None:
+        label = self.rng.choice(self.catalog["labels"])
+        for end in range(1, min(len(label), 8) + 1):
+            await self.get("search", f"/search?q={quote(label[:end])}", {"Accept-Encoding": ACCEPT_ENCODING})
+            await self.pause(0.1)
+
+    async def session(self) -> None:
+        await self.page_view()
+        for _ in range(self.rng.randint(0, 5)):
+            await self.pause()
+            await self.hud_click()
+        if self.rng.random() < 0.4:
+            await self.pause()
+            await self.search()
+        self.stats.sessions += 1
+
+
+async def fetch_catalog(host: str, port: int) -> dict:
+    connection = Connection(host, port)
+    status, _, body, _ = await connection.request("/graph")
+    await connection.close()
+    if status != 200:
+        raise SystemExit(f"GET /graph returned {status}")
+    nodes = json.loads(body)["nodes"]
+    return {"ids": [node["id"] for node in nodes], "labels": [node["label"] for node in nodes if node.get("label")]}
+
+
+async def run(args, host: str, port: int) -> dict:
+    catalog = await fetch_catalog(host, port)
+    stats = Stats()
+    deadline = time.perf_counter() + args.duration
+    rng = random.Random(args.seed)
+    users = [User(host, port, stats, catalog, random.Random(rng.random()), args.think) for _ in range(args.users)]
+
+    async def closed_loop(user: User) -> None:
+        while time.perf_counter() < deadline:
+            await user.session()
+
+    start = time.perf_counter()
+    if args.rate:
+        idle: asyncio.Queue = asyncio.Queue()
+        for user in users:
+            idle.put_nowait(user)
+        running = set()
+
+        async def one(user: User) -> None:
+            try:
+                await user.session()
+            finally:
+                idle.put_nowait(user)
+
+        while time.perf_counter() < deadline:
+            await asyncio.sleep(rng.expovariate(args.rate))
+            if idle.empty():
+                # Every user is busy: the server is not keeping up with the rate.
+                stats.dropped_sessions += 1
+                continue
+            task = asyncio.create_task(one(idle.get_nowait()))
+            running.add(task)
+            task.add_done_callback(running.discard)
+        await asyncio.gather(*running)
+    else:
+        await asyncio.gather(*(closed_loop(user) for user in users))
+    elapsed = time.perf_counter() - start
+
+    for user in users:
+        await user.connection.close()
+    return stats.report(elapsed)
+
+
+def start_server(port: int, workers: int, data_path: str | None) -> subprocess.Popen:
+    env = dict(os.environ)
+    if data_path:
+        env["DATA_PATH"] = str(Path(data_path).resolve())
+    command = [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers), "--log-level", "warning"]
+    return subprocess.Popen(command, cwd=BACKEND_DIR, env=env)
+
+
+async def wait_until_ready(host: str, port: int, timeout: float = 60.0) -> None:
+    deadline = time.perf_counter() + timeout
+    while True:
+        connection = Connection(host, port)
+        try:
+            status, _, _, _ = await connection.request("/")
+            if status == 200:
+                return
+        except (OSError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            await connection.close()
+        if time.perf_counter() > deadline:
+            raise SystemExit(f"server on {host}:{port} did not become ready")
+        await asyncio.sleep(0.2)
+
+
+def print_report(report: dict) -> None:
+    print(f"{report['sessions']} sessions, {report['requests']} requests in {report['elapsed_s']:.1f}s "
+          f"({report['requests_per_sec']:.1f} req/s), {report['errors']} errors, {report['bytes'] / 1e6:.1f} MB received")
+    if report["dropped_sessions"]:
+        print(f"  {report['dropped_sessions']} sessions dropped: every user was busy when they were due (the server is not keeping up with --rate)")
+    for name, row in report["endpoints"].items():
+        print(f"  {name:<16} {row['requests']:>8} req  {row['errors']:>5} err  "
+              f"p50 {row['p50_ms']:>8.2f} ms  p95 {row['p95_ms']:>8.2f} ms  p99 {row['p99_ms']:>8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay frontend traffic against the API")
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="API base URL")
+    parser.add_argument("--start-server", action="store_true", help="Start uvicorn on the URL's port first")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers (with --start-server)")
+    parser.add_argument("--data", help="DATA_PATH for the started server")
+    parser.add_argument("--users", type=int, default=20, help="Concurrent virtual users (connections)")
+    parser.add_argument("--rate", type=float, help="Sessions started per second (open loop)")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to run")
+    parser.add_argument("--think", type=float, default=0.5, help="Mean think time between actions, seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", help="Write the report as JSON")
+    args = parser.parse_args()
+
+    url = urlsplit(args.url)
+    host, port = url.hostname or "127.0.0.1", url.port or 80
+    server = start_server(port, args.workers, args.data) if args.start_server else None
+    try:
+        if server is not None:
+            asyncio.run(wait_until_ready(host, port))
+        report = asyncio.run(run(args, host, port))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    report["config"] = {key: getattr(args, key) for key in ("url", "workers", "users", "rate", "duration", "think", "seed")}
+    print_report(report)
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""Check that the event loop stays responsive while a large dataset reloads.
+
+    python -m benchmarks.responsiveness --links 100000 --max-lag-ms 100
+
+Loads a generated dataset, then replaces the file with a different one while
+a heartbeat task measures event-loop lag and the /graph, /search and
+/node/{id} handlers keep being called. Exits with status 1 if the loop ever
+stalls longer than ``--max-lag-ms`` or a handler doesn't return in time, and
+reports how long it took until the new version was served.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from fastapi import Response
+
+os.environ["DATA_RELOAD_INTERVAL"] = "0"
+
+import main  # noqa: E402  (reads DATA_RELOAD_INTERVAL on import)
+from benchmarks.run import graph_request  # noqa: E402
+from generate_dataset import generate  # noqa: E402
+from graph_store import executor  # noqa: E402
+
+HEARTBEAT = 0.005
+
+
+def write_dataset(path: Path, links: int, seed: int) -> None:
+    biomarkers = 500
+    foods = max(links // 50, 2 * -(-links // biomarkers))
+    data = generate(foods, biomarkers, links, "powerlaw", 1.1, 0.5, seed)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(data, indent=2), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+async def heartbeat(lags: list[float], stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        expected = time.perf_counter() + HEARTBEAT
+        await asyncio.sleep(HEARTBEAT)
+        lags.append(max(0.0, time.perf_counter() - expected))
+
+
+async def check(args) -> bool:
+    loop = asyncio.get_running_loop()
+    with tempfile.TemporaryDirectory(prefix="bionutrigraph-responsiveness-") as tmp:
+        path = Path(tmp) / "dataset.json"
+        os.environ["DATA_PATH"] = str(path)
+        print(f"Generating two datasets with {args.links} links ...", flush=True)
+        await loop.run_in_executor(None, write_dataset, path, args.links, 1)
+        replacement = Path(tmp) / "replacement.json"
+        await loop.run_in_executor(None, write_dataset, replacement, args.links, 2)
+        # Start up like the API does, then wait for the background warm.
+        await main.storage.start()
+        first = main.store.get()
+        await loop.run_in_executor(executor, first.warm)
+        node_id = first.nodes[0]["id"]
+
+        lags: list[float] = []
+        handler_times: list[float] = []
+        stop = asyncio.Event()
+        beat = asyncio.create_task(heartbeat(lags, stop))
+
+        start = time.perf_counter()
+        await loop.run_in_executor(None, os.replace, replacement, path)
+        while main.store.get() is first or not main.store.get().built("graph_payload"):
+            for call in (
+                lambda: main.get_graph(graph_request(), citations="inline"),
+                lambda: main.search_nodes(Response(), q="oat", limit=50, offset=0, type=None, group=None),
+                lambda: main.get_node_details(node_id),
+            ):
+                t0 = time.perf_counter()
+                await asyncio.wait_for(call(), args.max_handler_s)
+                handler_times.append(time.perf_counter() - t0)
+            await asyncio.sleep(0.01)
+            if time.perf_counter() - start > args.timeout:
+                print("The new dataset was never served.")
+                stop.set()
+                await beat
+                return False
+        reload_seconds = time.perf_counter() - start
+        stop.set()
+        await beat
+
+    lags.sort()
+    handler_times.sort()
+    max_lag = lags[-1] * 1000 if lags else 0.0
+    print(f"New version served after {reload_seconds:.2f}s")
+    print(f"Event-loop lag: p50 {lags[len(lags) // 2] * 1000:.1f} ms, p99 {lags[int(len(lags) * 0.99)] * 1000:.1f} ms, max {max_lag:.1f} ms over {len(lags)} beats")
+    print(f"Handler calls during reload: {len(handler_times)}, max {handler_times[-1] * 1000:.1f} ms")
+    ok = max_lag <= args.max_lag_ms
+    print("OK" if ok else f"FAIL: the event loop stalled for more than {args.max_lag_ms} ms")
+    return ok
+
+
+def cli():
+    parser = argparse.ArgumentParser(description="Measure event-loop responsiveness during a dataset reload")
+    parser.add_argument("--links", type=int, default=100000)
+    parser.add_argument("--max-lag-ms", type=float, default=100.0)
+    parser.add_argument("--max-handler-s", type=float, default=1.0, help="Fail if a handler takes longer than this")
+    parser.add_argument("--timeout", type=float, default=300.0)
+    args = parser.parse_args()
+    sys.exit(0 if asyncio.run(check(args)) else 1)
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""In-process micro-benchmarks for the API handlers and dataset code.
+
+    python -m benchmarks.run --sizes 1000 10000 100000 -o bench.json
+    python -m benchmarks.compare baseline.json bench.json --threshold 0.25
+
+Each size is a synthetic dataset (generate_dataset.py) with that many links.
+For every case the suite reports throughput, p50/p95/p99 latency and the
+peak traced memory of a single call, and writes them as JSON. Per case it
+also reports how time grows with size (the exponent of a power-law fit), so
+an accidental O(n^2) stands out even without a baseline.
+"""
+import argparse
+import asyncio
+import inspect
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from fastapi import Response
+from starlette.requests import Request
+
+import main
+from enrich_dataset_comprehensive import ensure_food, upsert_link
+from generate_dataset import generate
+from graph_store import load_snapshot
+from snapshot_format import compile_file
+
+SEARCH_TERMS = ("oat", "salmon", "vit", "ldl", "ch", "tea 3")
+
+
+def graph_request() -> Request:
+    headers = [(b"accept-encoding", b"gzip, deflate, br")]
+    return Request({"type": "http", "method": "GET", "path": "/graph", "headers": headers, "query_string": b""})
+
+
+def cases(json_path: Path, compiled_path: Path, data: dict) -> dict:
+    """Case name -> zero-argument callable (sync or async)."""
+    nodes = data["nodes"]
+    links = data["links"]
+    node_ids = [node["id"] for node in nodes]
+    foods = [node for node in nodes if node["type"] == "food"]
+    counter = iter(range(1 << 62))
+
+    def cycle(values):
+        return values[next(counter) % len(values)]
+
+    scratch_nodes = list(nodes)
+    scratch_links = list(links)
+    last = links[-1]
+
+    def ensure_food_new():
+        try:
+            return ensure_food(scratch_nodes, f"Bench Food {next(counter)}", "Fruits")
+        finally:
+            # Drop the appended node so every iteration scans the same list.
+            del scratch_nodes[len(nodes):]
+
+    return {
+        "load_json": lambda: load_snapshot(json_path).warm(),
+        "load_compiled": lambda: load_snapshot(compiled_path).warm(),
+        "get_graph": lambda: main.get_graph(graph_request(), citations="inline"),
+        "search_nodes": lambda: main.search_nodes(Response(), q=cycle(SEARCH_TERMS), limit=50, offset=0, type=None, group=None),
+        "get_node_details": lambda: main.get_node_details(cycle(node_ids)),
+        # Existing label: one pass over the nodes.
+        "ensure_food_existing": lambda: ensure_food(scratch_nodes, cycle(foods)["label"], "Fruits"),
+        # New label: a pass plus the max-id scan (the same scan as get_next_id
+        # in expand_data.py, which runs on import and can't be called here).
+        "ensure_food_new": ensure_food_new,
+        # Worst case: the pair is the last link.
+        "upsert_link_existing": lambda: upsert_link(
+            scratch_links, last["source"], last["target"], "increase", "low", "", "", "", []
+        ),
+    }
+
+
+async def call(fn) -> None:
+    result = fn()
+    if inspect.isawaitable(result):
+        await result
+
+
+async def measure(fn, min_time: float, min_iterations: int, max_iterations: int) -> dict:
+    await call(fn)  # warm-up
+    timings = []
+    started = time.perf_counter()
+    while len(timings) < max_iterations and (len(timings) < min_iterations or time.perf_counter() - started < min_time):
+        t0 = time.perf_counter_ns()
+        await call(fn)
+        timings.append(time.perf_counter_ns() - t0)
+    elapsed = sum(timings) / 1e9
+
+    tracemalloc.start()
+    await call(fn)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    timings.sort()
+
+    def percentile(p: float) -> float:
+        return timings[min(len(timings) - 1, math.ceil(p * len(timings)) - 1)] / 1e6
+
+    return {
+        "iterations": len(timings),
+        "ops_per_sec": len(timings) / elapsed if elapsed else float("inf"),
+        "p50_ms": percentile(0.50),
+        "p95_ms": percentile(0.95),
+        "p99_ms": percentile(0.99),
+        "peak_kib": peak / 1024,
+    }
+
+
+def scaling(results: list[dict]) -> dict:
+    """Least-squares slope of log(p50) against log(size), per case."""
+    by_case: dict[str, list[tuple[float, float]]] = {}
+    for row in results:
+        if row["p50_ms"] > 0:
+            by_case.setdefault(row["case"], []).append((math.log(row["size"]), math.log(row["p50_ms"])))
+    exponents = {}
+    for case, points in by_case.items():
+        if len(points) < 2:
+            continue
+        mean_x = sum(x for x, _ in points) / len(points)
+        mean_y = sum(y for _, y in points) / len(points)
+        var = sum((x - mean_x) ** 2 for x, _ in points)
+        if var:
+            exponents[case] = sum((x - mean_x) * (y - mean_y) for x, y in points) / var
+    return exponents
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(args) -> dict:
+    results = []
+    with tempfile.TemporaryDirectory(prefix="bionutrigraph-bench-") as tmp:
+        workdir = Path(tmp)
+        for size in args.sizes:
+            biomarkers = max(10, min(500, size // 50))
+            foods = max(20, size // 20, 2 * -(-size // biomarkers))
+            data = generate(foods, biomarkers, size, "powerlaw", 1.1, 0.5, args.seed)
+            json_path = workdir / f"bench-{size}.json"
+            json_path.write_text(json.dumps(data, indent=2), encoding="utf-8")
+            compiled_path = workdir / f"bench-{size}.bng"
+            compile_file(json_path, compiled_path)
+
+            os.environ["DATA_PATH"] = str(json_path)
+            main.store.reload(force=True)
+
+            for name, fn in cases(json_path, compiled_path, data).items():
+                if args.only and name not in args.only:
+                    continue
+                stats = await measure(fn, args.min_time, args.min_iterations, args.max_iterations)
+                row = {"case": name, "size": size, **stats}
+                results.append(row)
+                print(
+                    f"{name:<22} {size:>9} links  {stats['ops_per_sec']:>10.1f} ops/s  "
+                    f"p50 {stats['p50_ms']:>9.3f} ms  p95 {stats['p95_ms']:>9.3f} ms  "
+                    f"p99 {stats['p99_ms']:>9.3f} ms  peak {stats['peak_kib']:>10.1f} KiB",
+                    flush=True,
+                )
+
+    exponents = scaling(results)
+    for case, exponent in sorted(exponents.items()):
+        print(f"scaling {case:<22} ~ n^{exponent:.2f}")
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "sizes": args.sizes,
+            "seed": args.seed,
+        },
+        "results": results,
+        "scaling": exponents,
+    }
+
+
+def cli():
+    parser = argparse.ArgumentParser(description="Run the backend micro-benchmarks")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000], help="Link counts to benchmark")
+    parser.add_argument("--only", nargs="+", help="Run only these cases")
+    parser.add_argument("--min-time", type=float, default=0.5, help="Seconds to spend per case")
+    parser.add_argument("--min-iterations", type=int, default=5)
+    parser.add_argument("--max-iterations", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", help="Write results as JSON")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+        print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    cli()
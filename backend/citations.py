@@ -0,0 +1,110 @@
+"""Normalized citation table.
+
+Citations are keyed by their canonical URL: the same one the frontend's
+``resolveCitationHref`` (frontend/src/utils/citations.ts) links to, so
+``pmid:123``, a bare DOI and a doi.org URL for one paper all collapse into a
+single row. Links then refer to rows by id (the row's position).
+"""
+import re
+from urllib.parse import quote
+
+# JavaScript's \s and String.prototype.trim() whitespace. Python's own \s and
+# strip() use a different Unicode set, and its \d matches any Unicode digit,
+# so the patterns are ASCII-only and spell the whitespace out.
+JS_WHITESPACE = "\t\n\v\f\r \u00a0\u1680\u2000\u2001\u2002\u2003\u2004\u2005\u2006\u2007\u2008\u2009\u200a\u2028\u2029\u202f\u205f\u3000\ufeff"
+_S = f"[{JS_WHITESPACE}]"
+_NOT_S = f"[^{JS_WHITESPACE}]"
+DOI_PATTERN = re.compile(rf"^10\.{_NOT_S}+/{_NOT_S}+$", re.IGNORECASE | re.ASCII)
+DOI_URL_PATTERN = re.compile(rf"^(https?://)?(dx\.)?doi\.org/10\.{_NOT_S}+/{_NOT_S}+$", re.IGNORECASE | re.ASCII)
+PMID_PATTERN = re.compile(rf"^pmid:{_S}*(\d+)$", re.IGNORECASE | re.ASCII)
+URL_PATTERN = re.compile(r"^https?://", re.IGNORECASE | re.ASCII)
+
+
+def encode_uri_component(value: str) -> str:
+    return quote(value, safe="-_.!~*'()")
+
+
+def canonical_href(raw_doi: str | None, title: str | None = None) -> str:
+    """Port of resolveCitationHref."""
+    raw = (raw_doi or "").strip(JS_WHITESPACE) if isinstance(raw_doi, str) else ""
+
+    if raw:
+        if URL_PATTERN.match(raw):
+            return raw
+
+        pmid = PMID_PATTERN.match(raw)
+        if pmid:
+            return f"https://pubmed.ncbi.nlm.nih.gov/{pmid.group(1)}/"
+
+        if DOI_URL_PATTERN.match(raw):
+            return raw if raw.startswith("http") else f"https://{raw}"
+        if DOI_PATTERN.match(raw):
+            return f"https://doi.org/{raw}"
+
+        return f"https://pubmed.ncbi.nlm.nih.gov/?term={encode_uri_component(raw)}"
+
+    if isinstance(title, str) and title.strip(JS_WHITESPACE):
+        return f"https://pubmed.ncbi.nlm.nih.gov/?term={encode_uri_component(title.strip(JS_WHITESPACE))}"
+
+    return "https://pubmed.ncbi.nlm.nih.gov/"
+
+
+def count_papers(link_citations) -> int:
+    """CitationTable(links).paper_count, from GraphIndex.link_citations("doi", "title")."""
+    return len({
+        canonical_href(doi, title)
+        for citations in link_citations
+        if isinstance(citations, tuple)
+        for doi, title in citations
+    })
+
+
+class CitationTable:
+    """One row per canonical key plus, per link, the ids of the rows it cites.
+
+    A row is the first citation record seen for its key. The normalized form
+    is therefore canonical rather than byte-exact; the inline form is always
+    served from the snapshot itself.
+    """
+
+    def __init__(self, links):
+        self.rows: list[dict] = []
+        self.keys: list[str] = []
+        self.link_citations: list[tuple[int, ...] | None] = []
+        self.ids: dict[str, int] = {}
+        for link in links:
+            citations = link.get("citations")
+            if not isinstance(citations, list) or not all(isinstance(c, dict) for c in citations):
+                # Left inline; normalized links keep whatever the record had.
+                self.link_citations.append(None)
+                continue
+            link_ids = []
+            for citation in citations:
+                key = canonical_href(citation.get("doi"), citation.get("title"))
+                citation_id = self.ids.get(key)
+                if citation_id is None:
+                    citation_id = self.ids[key] = len(self.rows)
+                    self.rows.append(citation)
+                    self.keys.append(key)
+                if citation_id not in link_ids:
+                    link_ids.append(citation_id)
+            # A tuple of ints, unlike a list, drops out of cyclic-GC tracking.
+            self.link_citations.append(tuple(link_ids))
+
+    @property
+    def paper_count(self) -> int:
+        return len(self.rows)
+
+    def normalize_link(self, idx: int, link: dict) -> dict:
+        citation_ids = self.link_citations[idx]
+        if citation_ids is None:
+            return link
+        return {**link, "citations": citation_ids}
+
+    def normalized(self, nodes, links) -> dict:
+        """The graph with links citing row ids and the table alongside."""
+        return {
+            "nodes": list(nodes),
+            "links": [self.normalize_link(idx, link) for idx, link in enumerate(links)],
+            "citations": self.rows,
+        }
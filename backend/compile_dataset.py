@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""Compile a JSON dataset into a memory-mappable snapshot or a SQLite database.
+
+    python compile_dataset.py data/mvp_dataset.json -o data/mvp_dataset.bng
+    python compile_dataset.py data/mvp_dataset.json -o data/mvp_dataset.sqlite3
+
+Point DATA_PATH at a snapshot to serve it, or set STORAGE_BACKEND=sqlite and
+SQLITE_PATH for a database. The format follows the output suffix.
+"""
+import argparse
+import hashlib
+import json
+from pathlib import Path
+
+from snapshot_format import compile_file
+from sqlite_store import write_database
+
+SQLITE_SUFFIXES = (".sqlite", ".sqlite3", ".db")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile a dataset JSON file into a binary snapshot")
+    parser.add_argument("source", help="Path to the dataset JSON")
+    parser.add_argument("-o", "--output", help="Output path (defaults to the source with a .bng suffix)")
+    args = parser.parse_args()
+
+    source = Path(args.source)
+    target = Path(args.output) if args.output else source.with_suffix(".bng")
+    if target.suffix in SQLITE_SUFFIXES:
+        raw = source.read_bytes()
+        version = hashlib.sha256(raw).hexdigest()
+        write_database(json.loads(raw), version, target)
+    else:
+        version = compile_file(source, target)
+    print(f"Compiled {source} -> {target} ({target.stat().st_size} bytes, version {version[:12]})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Pre-serialized, pre-compressed response bodies with ETag revalidation."""
+import gzip
+import hashlib
+import json
+import os
+
+from fastapi import Request, Response
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip and identity still work without it
+    brotli = None
+
+CACHE_CONTROL = os.getenv("GRAPH_CACHE_CONTROL", "public, max-age=60, must-revalidate")
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 9
+
+
+def dumps(obj) -> bytes:
+    # Same output as FastAPI's JSONResponse.
+    return json.dumps(obj, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def dumps_incremental(obj) -> bytes:
+    """dumps(), encoding the lists of a top-level dict one item at a time.
+
+    Output is byte-identical. A single json.dumps call holds the GIL until the
+    whole body is encoded; this lets the event loop run while a large payload
+    is built in a worker thread.
+    """
+    if not isinstance(obj, dict):
+        return dumps(obj)
+    # One flat join: concatenating large intermediate bytes objects stalls too.
+    parts = [b"{"]
+    for i, (key, value) in enumerate(obj.items()):
+        if i:
+            parts.append(b",")
+        parts.append(dumps(key) + b":")
+        if isinstance(value, list):
+            parts.append(b"[")
+            for j, item in enumerate(value):
+                if j:
+                    parts.append(b",")
+                parts.append(dumps(item))
+            parts.append(b"]")
+        else:
+            parts.append(dumps(value))
+    parts.append(b"}")
+    return b"".join(parts)
+
+
+class EncodedPayload:
+    """One response body held in every encoding we are willing to serve.
+
+    Each encoding is its own representation with its own strong ETag
+    (``"<hash>"``, ``"<hash>-gzip"``, ``"<hash>-br"``); a validator for any of
+    them revalidates the body.
+    """
+
+    def __init__(self, body: bytes, media_type: str = "application/json"):
+        self.media_type = media_type
+        self.digest = hashlib.sha256(body).hexdigest()[:32]
+        self.encodings = {"identity": body, "gzip": gzip.compress(body, GZIP_LEVEL, mtime=0)}
+        if brotli is not None:
+            self.encodings["br"] = brotli.compress(body, quality=BROTLI_QUALITY)
+
+    @classmethod
+    def from_json(cls, obj) -> "EncodedPayload":
+        return cls(dumps_incremental(obj))
+
+    @property
+    def body(self) -> bytes:
+        return self.encodings["identity"]
+
+    def etag(self, coding: str = "identity") -> str:
+        return '"%s"' % (self.digest if coding == "identity" else f"{self.digest}-{coding}")
+
+    def choose_encoding(self, accept_encoding: str | None) -> str:
+        accepted = {}
+        for part in (accept_encoding or "").split(","):
+            coding, _, params = part.strip().partition(";")
+            coding = coding.strip().lower()
+            if not coding:
+                continue
+            quality = 1.0
+            params = params.strip()
+            if params.startswith("q="):
+                try:
+                    quality = float(params[2:])
+                except ValueError:
+                    quality = 0.0
+            accepted[coding] = quality
+
+        for coding in ("br", "gzip"):
+            if coding in self.encodings and accepted.get(coding, accepted.get("*", 0.0)) > 0:
+                return coding
+        return "identity"
+
+    def response(self, request: Request) -> Response:
+        coding = self.choose_encoding(request.headers.get("accept-encoding"))
+        headers = {"ETag": self.etag(coding), "Cache-Control": CACHE_CONTROL, "Vary": "Accept-Encoding"}
+        if etag_matches(request.headers.get("if-none-match"), self.digest):
+            return Response(status_code=304, headers=headers)
+
+        if coding != "identity":
+            headers["Content-Encoding"] = coding
+        return Response(content=self.encodings[coding], media_type=self.media_type, headers=headers)
+
+
+def etag_matches(if_none_match: str | None, digest: str) -> bool:
+    """Whether If-None-Match names any coding variant of the body ``digest``."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison, so W/"x" matches "x".
+    for tag in if_none_match.split(","):
+        value = tag.strip().removeprefix("W/").strip('"')
+        if value.partition("-")[0] == digest:
+            return True
+    return False
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""Generate a synthetic dataset with the same schema as mvp_dataset.json.
+
+    python generate_dataset.py --foods 10000 --biomarkers 500 --links 1000000 \
+        --degree powerlaw --citation-reuse 0.7 --seed 1 -o data/synthetic \
+        --format json ndjson bng sqlite3
+
+Links run from foods to biomarkers, one per (food, biomarker) pair. Food
+out-degrees and biomarker popularity follow ``--degree``: ``uniform`` or a
+Zipf-like ``powerlaw`` with exponent ``--alpha``. Each link cites one or two
+papers; with probability ``--citation-reuse`` a citation reuses an earlier
+paper instead of minting a new one. Field values are drawn from vocabularies
+shaped like the real dataset. The same arguments always produce the same
+files.
+"""
+import argparse
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+from snapshot_format import compile_data
+from sqlite_store import write_database
+
+FOOD_GROUPS = ("Vegetables", "Fruits", "Protein", "Beverages", "Seafood", "Grains", "Nuts", "Supplements", "Seeds", "Legumes", "Fermented", "Spices", "Fats", "Dairy", "Herbs")
+BIOMARKER_GROUPS = ("Lipids", "Vitamins", "Hematology", "Liver", "Inflammation", "Metabolic", "Kidney", "Minerals", "Cardiovascular", "Hormones", "Immune", "Thyroid", "Electrolytes")
+FOOD_NAMES = ("Oats", "Spinach", "Blueberries", "Salmon", "Lentils", "Walnuts", "Kefir", "Turmeric", "Green Tea", "Flaxseed", "Broccoli", "Avocado", "Quinoa", "Sardines", "Garlic", "Almonds", "Chickpeas", "Kale", "Beets", "Ginger")
+FOOD_VARIANTS = ("Raw", "Steamed", "Roasted", "Organic", "Sprouted", "Fermented", "Dried", "Wild", "Aged", "Fresh")
+BIOMARKER_NAMES = ("LDL Cholesterol", "HDL Cholesterol", "Triglycerides", "Ferritin", "Vitamin D", "CRP", "HbA1c", "ALT", "Creatinine", "TSH", "Homocysteine", "Cortisol", "Magnesium", "Potassium")
+MAGNITUDES = ("Supportive", "Variable", "Modest", "Significant", "Moderate", "High", "~5%", "Very High", "~10%", "5-10%", "~15%", "~3 mmHg")
+TIMEFRAMES = ("Chronic", "Acute", "8 weeks", "8-12 weeks", "4 weeks", "12 weeks", "4-8 weeks", "6 weeks", "Hours")
+STRENGTHS = ("medium", "high", "low")
+STRENGTH_WEIGHTS = (0.49, 0.30, 0.21)
+CITATION_TYPES = ("review", "journal")
+TWO_CITATION_RATE = 0.03
+
+
+def positive_int(value: str) -> int:
+    """argparse type for sizes: an int greater than zero."""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: {value!r}")
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"must be greater than 0, got {value}")
+    return number
+
+
+def weights(count: int, distribution: str, alpha: float, rng) -> np.ndarray:
+    if distribution == "uniform":
+        w = np.ones(count)
+    else:
+        w = 1.0 / np.arange(1, count + 1) ** alpha
+        rng.shuffle(w)
+    return w / w.sum()
+
+
+def out_degrees(total: int, p: np.ndarray, cap: int, rng) -> np.ndarray:
+    """Split ``total`` links over nodes in proportion to ``p``, at most ``cap`` each."""
+    degrees = rng.multinomial(total, p)
+    while True:
+        overflow = int(np.clip(degrees - cap, 0, None).sum())
+        if not overflow:
+            return degrees
+        np.minimum(degrees, cap, out=degrees)
+        room = np.where(degrees < cap, p, 0.0)
+        degrees += rng.multinomial(overflow, room / room.sum())
+
+
+def label_for(names: tuple, variants: tuple, i: int) -> str:
+    base = names[i % len(names)]
+    variant = variants[(i // len(names)) % len(variants)]
+    round_ = i // (len(names) * len(variants))
+    return f"{variant} {base}" + (f" {round_ + 1}" if round_ else "")
+
+
+def generate(foods: int, biomarkers: int, links: int, degree: str, alpha: float, citation_reuse: float, seed: int) -> dict:
+    if links > foods * biomarkers:
+        raise ValueError(f"at most {foods * biomarkers} links fit {foods} foods x {biomarkers} biomarkers")
+    rng = np.random.default_rng(seed)
+    food_width = max(3, len(str(foods)))
+    bio_width = max(3, len(str(biomarkers)))
+
+    nodes = []
+    for i in range(biomarkers):
+        group = BIOMARKER_GROUPS[i % len(BIOMARKER_GROUPS)]
+        label = label_for(BIOMARKER_NAMES, ("Serum", "Plasma", "Fasting", "Urinary", "Total"), i)
+        nodes.append({"id": f"bio-{i + 1:0{bio_width}d}", "label": label, "type": "biomarker", "group": group, "description": f"{label}, a {group.lower()} marker measured in routine panels."})
+    for i in range(foods):
+        group = FOOD_GROUPS[int(rng.integers(len(FOOD_GROUPS)))]
+        label = label_for(FOOD_NAMES, FOOD_VARIANTS, i)
+        nodes.append({"id": f"food-{i + 1:0{food_width}d}", "label": label, "type": "food", "group": group, "description": f"{label}, part of the {group.lower()} group."})
+
+    degrees = out_degrees(links, weights(foods, degree, alpha, rng), biomarkers, rng)
+    popularity = weights(biomarkers, degree, alpha, rng)
+    papers: list[dict] = []
+    effects = rng.integers(2, size=links)
+    strengths = rng.choice(len(STRENGTHS), size=links, p=STRENGTH_WEIGHTS)
+    magnitudes = rng.integers(len(MAGNITUDES), size=links)
+    timeframes = rng.integers(len(TIMEFRAMES), size=links)
+
+    def cite() -> dict:
+        if papers and rng.random() < citation_reuse:
+            return papers[int(rng.integers(len(papers)))]
+        n = len(papers) + 1
+        paper = {"title": f"Synthetic study {n} on dietary biomarkers", "year": int(rng.integers(1995, 2025)), "doi": f"10.5555/synthetic.{n}", "type": CITATION_TYPES[n % 2]}
+        papers.append(paper)
+        return paper
+
+    out = []
+    for food, degree_ in enumerate(degrees):
+        if not degree_:
+            continue
+        food_node = nodes[biomarkers + food]
+        for bio in rng.choice(biomarkers, size=int(degree_), replace=False, p=popularity):
+            k = len(out)
+            bio_node = nodes[bio]
+            effect = ("increase", "decrease")[effects[k]]
+            citations = [cite()]
+            if rng.random() < TWO_CITATION_RATE:
+                citations.append(cite())
+            out.append({
+                "source": food_node["id"],
+                "target": bio_node["id"],
+                "effect": effect,
+                "strength": STRENGTHS[strengths[k]],
+                "magnitude": MAGNITUDES[magnitudes[k]],
+                "timeframe": TIMEFRAMES[timeframes[k]],
+                "summary": f"{food_node['label']} may {effect} {bio_node['label']}.",
+                "citations": [dict(c) for c in citations],
+            })
+    return {"nodes": nodes, "links": out}
+
+
+def write_atomic(path: Path, payload: bytes) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(payload)
+    os.replace(tmp, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic food/biomarker dataset")
+    parser.add_argument("--foods", type=positive_int, default=10000)
+    parser.add_argument("--biomarkers", type=positive_int, default=500)
+    parser.add_argument("--links", type=positive_int, default=100000)
+    parser.add_argument("--degree", choices=("uniform", "powerlaw"), default="powerlaw")
+    parser.add_argument("--alpha", type=float, default=1.1, help="Power-law exponent")
+    parser.add_argument("--citation-reuse", type=float, default=0.5, help="Probability a citation reuses an earlier paper")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", default="data/synthetic", help="Output path without suffix")
+    parser.add_argument("--format", nargs="+", choices=("json", "ndjson", "bng", "sqlite3"), default=["json"])
+    args = parser.parse_args()
+
+    data = generate(args.foods, args.biomarkers, args.links, args.degree, args.alpha, args.citation_reuse, args.seed)
+    raw = json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8")
+    version = hashlib.sha256(raw).hexdigest()
+    base = Path(args.output)
+    base.parent.mkdir(parents=True, exist_ok=True)
+
+    for fmt in args.format:
+        target = base.with_name(f"{base.name}.{fmt}")
+        if fmt == "sqlite3":
+            write_database(data, version, target)
+            print(f"Wrote {target} ({target.stat().st_size} bytes)")
+            continue
+        if fmt == "json":
+            payload = raw
+        elif fmt == "ndjson":
+            # Same record layout as GET /graph/stream.
+            lines = [{"meta": {"version": version, "nodes": len(data["nodes"]), "links": len(data["links"])}}]
+            lines += [{"node": node} for node in data["nodes"]]
+            lines += [{"link": link} for link in data["links"]]
+            payload = "".join(json.dumps(line, ensure_ascii=False, separators=(",", ":")) + "\n" for line in lines).encode("utf-8")
+        else:
+            payload = compile_data(data, version)
+        write_atomic(target, payload)
+        print(f"Wrote {target} ({len(payload)} bytes)")
+
+    print(f"{len(data['nodes'])} nodes, {len(data['links'])} links, version {version[:12]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""Lookup structures built once per dataset snapshot.
+
+Adjacency is stored CSR-style: for node position ``i`` the indices of its
+outgoing links are ``out_links[out_offsets[i]:out_offsets[i + 1]]`` (and the
+same for incoming links), where link indices point into the snapshot's link
+list. Lists are in link-table order, so lookups return links in the same
+order as a full scan would.
+"""
+from array import array
+from collections import deque
+
+from graph_model import citation_fields
+
+
+def _csr(endpoints: array, node_count: int) -> tuple[array, array]:
+    """Counting sort of link indices by endpoint position."""
+    offsets = array("l", [0]) * (node_count + 1)
+    for pos in endpoints:
+        if pos >= 0:
+            offsets[pos + 1] += 1
+    for i in range(node_count):
+        offsets[i + 1] += offsets[i]
+
+    cursor = array("l", offsets)
+    order = array("l", [0]) * offsets[node_count]
+    for link_idx, pos in enumerate(endpoints):
+        if pos >= 0:
+            order[cursor[pos]] = link_idx
+            cursor[pos] += 1
+    return offsets, order
+
+
+def _positions(node_ids) -> dict:
+    # First occurrence wins, matching a linear next(...) scan.
+    position = {}
+    for pos, node_id in enumerate(node_ids):
+        position.setdefault(node_id, pos)
+    return position
+
+
+class GraphIndex:
+    def __init__(self, nodes, links):
+        self.nodes = nodes
+        self.links = links
+        # The GraphModel or CompiledGraph behind the records, when there is one.
+        self.graph = None
+        self.position: dict[str, int] = _positions(node.get("id") for node in nodes)
+
+        # Endpoints of links to unknown node ids are stored as -1.
+        self.sources = array("l", (self.position.get(link.get("source"), -1) for link in links))
+        self.targets = array("l", (self.position.get(link.get("target"), -1) for link in links))
+        self.out_offsets, self.out_links = _csr(self.sources, len(nodes))
+        self.in_offsets, self.in_links = _csr(self.targets, len(nodes))
+
+    @classmethod
+    def from_model(cls, model) -> "GraphIndex":
+        """Index a GraphModel from its integer link endpoints."""
+        index = cls.__new__(cls)
+        index.nodes = model.node_records
+        index.links = model.link_records
+        index.graph = model
+        index.position = model.position
+        index.sources = array("l", (link.source for link in model.links))
+        index.targets = array("l", (link.target for link in model.links))
+        index.out_offsets, index.out_links = _csr(index.sources, len(model.nodes))
+        index.in_offsets, index.in_links = _csr(index.targets, len(model.nodes))
+        return index
+
+    @classmethod
+    def from_compiled(cls, graph) -> "GraphIndex":
+        """Wrap the columns of a CompiledGraph without copying them."""
+        index = cls.__new__(cls)
+        index.nodes = graph.nodes
+        index.links = graph.links
+        index.graph = graph
+        index.position = _positions(graph.node_ids())
+        index.sources = graph.columns["link.source"]
+        index.targets = graph.columns["link.target"]
+        index.out_offsets = graph.columns["out.offsets"]
+        index.out_links = graph.columns["out.links"]
+        index.in_offsets = graph.columns["in.offsets"]
+        index.in_links = graph.columns["in.links"]
+        return index
+
+    def link_values(self, name: str, default=None) -> list:
+        """``link.get(name, default)`` for every link, without decoding whole records."""
+        if self.graph is not None:
+            return self.graph.link_values(name, default)
+        return [link.get(name, default) for link in self.links]
+
+    def link_citations(self, *fields: str) -> list:
+        """Per link, its citations as tuples of ``citation.get(field)`` (see
+        graph_model.citation_fields), or None when it has none."""
+        if self.graph is not None:
+            return self.graph.link_citations(*fields)
+        return [citation_fields(link["citations"], fields) if "citations" in link else None for link in self.links]
+
+    def node(self, node_id: str) -> dict | None:
+        pos = self.position.get(node_id)
+        return None if pos is None else self.nodes[pos]
+
+    def out_link_ids(self, pos: int):
+        return self.out_links[self.out_offsets[pos]:self.out_offsets[pos + 1]]
+
+    def in_link_ids(self, pos: int):
+        return self.in_links[self.in_offsets[pos]:self.in_offsets[pos + 1]]
+
+    def link_ids(self, pos: int) -> list[int]:
+        """Indices of every link touching the node, in link-table order."""
+        outgoing = self.out_link_ids(pos)
+        incoming = self.in_link_ids(pos)
+        if not incoming:
+            return list(outgoing)
+        if not outgoing:
+            return list(incoming)
+        # Self-loops appear in both lists; report them once.
+        return sorted(set(outgoing).union(incoming))
+
+    def degree(self, pos: int) -> int:
+        return len(self.link_ids(pos))
+
+    def node_links(self, node_id: str) -> list[dict]:
+        pos = self.position.get(node_id)
+        if pos is None:
+            return []
+        return [self.links[i] for i in self.link_ids(pos)]
+
+    def neighbors(self, pos: int) -> list[int]:
+        """Positions of the nodes sharing a link with ``pos``, first-seen order."""
+        seen: dict[int, None] = {}
+        for link_idx in self.link_ids(pos):
+            other = self.targets[link_idx] if self.sources[link_idx] == pos else self.sources[link_idx]
+            if other >= 0 and other != pos:
+                seen[other] = None
+        return list(seen)
+
+    def neighborhood(
+        self,
+        seeds: list[str],
+        depth: int,
+        max_nodes: int,
+        node_filter=None,
+        link_filter=None,
+    ) -> tuple[list[int], list[int], bool]:
+        """Breadth-first expansion from the seed ids, up to ``depth`` hops.
+
+        Seeds are always kept; other nodes must pass ``node_filter`` and are
+        only reached over links passing ``link_filter``. Returns node
+        positions in BFS order, the ids of the links induced between them
+        (in link-table order) and whether the node budget cut the walk short.
+        """
+        selected: dict[int, None] = {}
+        frontier = deque()
+        for seed in seeds:
+            pos = self.position.get(seed)
+            if pos is not None and pos not in selected and len(selected) < max_nodes:
+                selected[pos] = None
+                frontier.append((pos, 0))
+
+        truncated = False
+        while frontier and not truncated:
+            pos, hops = frontier.popleft()
+            if hops >= depth:
+                continue
+            for link_idx in self.link_ids(pos):
+                if link_filter is not None and not link_filter(self.links[link_idx]):
+                    continue
+                other = self.targets[link_idx] if self.sources[link_idx] == pos else self.sources[link_idx]
+                if other < 0 or other in selected:
+                    continue
+                if node_filter is not None and not node_filter(self.nodes[other]):
+                    continue
+                if len(selected) >= max_nodes:
+                    truncated = True
+                    break
+                selected[other] = None
+                frontier.append((other, hops + 1))
+
+        link_ids = []
+        for pos in selected:
+            for link_idx in self.out_link_ids(pos):
+                if self.targets[link_idx] in selected and (link_filter is None or link_filter(self.links[link_idx])):
+                    link_ids.append(link_idx)
+        link_ids.sort()
+        return list(selected), link_ids, truncated
@@ -0,0 +1,277 @@
+"""Compact typed representation of the dataset records.
+
+Nodes, links and citations are ``__slots__`` objects instead of dicts.
+``type``, ``effect`` and ``strength`` are enum members, repeated strings
+(groups, timeframes, citation types, ...) are interned once per model, link
+endpoints are integer node handles (positions in ``GraphModel.nodes``) and
+identical citation records are stored once in ``GraphModel.citations``, with
+links holding their ids.
+
+Every record remembers its key order and keeps anything that doesn't fit a
+typed slot in ``extra``, so ``GraphModel.node()``/``link()`` reproduce the
+original JSON records exactly, and the model keeps the dataset's other
+top-level members (``meta`` and the like), so ``to_data()`` reproduces the
+whole file.
+"""
+import json
+from enum import Enum
+
+
+class NodeType(Enum):
+    FOOD = "food"
+    BIOMARKER = "biomarker"
+
+
+class Effect(Enum):
+    INCREASE = "increase"
+    DECREASE = "decrease"
+
+
+class Strength(Enum):
+    LOW = "low"
+    MEDIUM = "medium"
+    HIGH = "high"
+
+
+class Records:
+    """Read-only sequence that turns records into dicts on access."""
+
+    def __init__(self, length: int, decode):
+        self._length = length
+        self._decode = decode
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return [self._decode(i) for i in range(*item.indices(self._length))]
+        if item < 0:
+            item += self._length
+        if not 0 <= item < self._length:
+            raise IndexError(item)
+        return self._decode(item)
+
+    def __iter__(self):
+        return map(self._decode, range(self._length))
+
+
+class _Interner:
+    def __init__(self):
+        self._values = {}
+
+    def __call__(self, value):
+        return self._values.setdefault(value, value)
+
+
+def _unpack(record: dict, slots: dict, intern: _Interner, obj) -> None:
+    """Fill ``obj``'s slots from ``record``; ``slots`` maps key -> converter."""
+    extra = None
+    for key, value in record.items():
+        convert = slots.get(key)
+        converted = convert(value) if convert is not None else None
+        if converted is None:
+            if extra is None:
+                extra = {}
+            extra[key] = value
+        else:
+            setattr(obj, key, converted)
+    obj.extra = extra
+    obj.shape = intern(tuple(record))
+
+
+def _pack(obj, encode: dict) -> dict:
+    extra = obj.extra
+    record = {}
+    for key in obj.shape:
+        if extra is not None and key in extra:
+            record[key] = extra[key]
+        else:
+            value = getattr(obj, key)
+            convert = encode.get(key)
+            record[key] = convert(value) if convert is not None else value
+    return record
+
+
+def citation_fields(value, fields: tuple):
+    """A link's ``citations`` value with each citation reduced to a tuple of
+    ``citation.get(field)``; values that aren't a list of dicts pass through."""
+    if isinstance(value, list) and all(isinstance(citation, dict) for citation in value):
+        return tuple(tuple(citation.get(field) for field in fields) for citation in value)
+    return value
+
+
+def top_level(data: dict) -> dict:
+    """The top-level members of a dataset in file order, with ``nodes`` and
+    ``links`` as placeholders for with_records() to fill in."""
+    return {key: None if key in ("nodes", "links") else value for key, value in data.items()}
+
+
+def with_records(top: dict, nodes: list, links: list) -> dict:
+    """The dataset object top_level() was taken from, with these records."""
+    records = {"nodes": nodes, "links": links}
+    return {key: records.get(key, value) for key, value in top.items()}
+
+
+def _field(obj, name: str, encode: dict, default):
+    """``record.get(name, default)`` for the record ``obj`` packs into."""
+    if obj.extra is not None and name in obj.extra:
+        return obj.extra[name]
+    if name not in obj.shape:
+        return default
+    value = getattr(obj, name)
+    convert = encode.get(name)
+    return convert(value) if convert is not None else value
+
+
+def str_or_none(value):
+    return value if isinstance(value, str) else None
+
+
+def _string(intern: _Interner):
+    return lambda value: intern(value) if isinstance(value, str) else None
+
+
+def _enum(enum: type[Enum]):
+    members = {member.value: member for member in enum}
+    return lambda value: members.get(value) if isinstance(value, str) else None
+
+
+def _enum_value(value) -> str:
+    return value.value
+
+
+class Node:
+    __slots__ = ("id", "label", "type", "group", "description", "extra", "shape")
+
+    def __init__(self):
+        self.id = self.label = self.type = self.group = self.description = None
+
+
+class Citation:
+    __slots__ = ("title", "year", "doi", "type", "extra", "shape")
+
+    def __init__(self):
+        self.title = self.year = self.doi = self.type = None
+
+
+class Link:
+    __slots__ = ("source", "target", "effect", "strength", "magnitude", "timeframe", "summary", "citations", "extra", "shape")
+
+    def __init__(self):
+        self.source = self.target = -1
+        self.effect = self.strength = self.magnitude = self.timeframe = self.summary = None
+        self.citations = ()
+
+
+class GraphModel:
+    def __init__(self, data: dict):
+        intern = _Interner()
+        text = _string(intern)
+
+        def year(value):
+            return value if isinstance(value, int) and not isinstance(value, bool) else None
+
+        node_slots = {"id": text, "label": str_or_none, "type": _enum(NodeType), "group": text, "description": str_or_none}
+        citation_slots = {"title": str_or_none, "year": year, "doi": str_or_none, "type": text}
+
+        self.top_level = top_level(data)
+        self.nodes: list[Node] = []
+        self.position: dict[str, int] = {}
+        for pos, record in enumerate(data.get("nodes", [])):
+            node = Node()
+            _unpack(record, node_slots, intern, node)
+            self.nodes.append(node)
+            if node.id is not None:
+                self.position.setdefault(node.id, pos)
+
+        def handle(value):
+            # Endpoints that don't resolve to a node keep their raw id in extra.
+            return self.position.get(value) if isinstance(value, str) else None
+
+        self.citations: list[Citation] = []
+        citation_ids: dict[str, int] = {}
+
+        def citations(value):
+            if not isinstance(value, list) or not all(isinstance(c, dict) for c in value):
+                return None
+            ids = []
+            for record in value:
+                identity = json.dumps(record, ensure_ascii=False)
+                citation_id = citation_ids.get(identity)
+                if citation_id is None:
+                    citation = Citation()
+                    _unpack(record, citation_slots, intern, citation)
+                    citation_id = citation_ids[identity] = len(self.citations)
+                    self.citations.append(citation)
+                ids.append(citation_id)
+            return intern(tuple(ids))
+
+        link_slots = {
+            "source": handle,
+            "target": handle,
+            "effect": _enum(Effect),
+            "strength": _enum(Strength),
+            "magnitude": text,
+            "timeframe": text,
+            "summary": str_or_none,
+            "citations": citations,
+        }
+        self.links: list[Link] = []
+        for record in data.get("links", []):
+            link = Link()
+            _unpack(record, link_slots, intern, link)
+            self.links.append(link)
+
+        # The encoders close over the record lists, not the model, so a model
+        # has no reference cycles and is freed as soon as it is released.
+        nodes, citation_list = self.nodes, self.citations
+        self._node_encode = {"type": _enum_value}
+        self._citation_encode = {}
+        self._link_encode = {
+            "source": lambda handle: nodes[handle].id,
+            "target": lambda handle: nodes[handle].id,
+            "effect": _enum_value,
+            "strength": _enum_value,
+            "citations": lambda ids: [_pack(citation_list[i], {}) for i in ids],
+        }
+
+    @property
+    def node_records(self) -> Records:
+        return Records(len(self.nodes), self.node)
+
+    @property
+    def link_records(self) -> Records:
+        return Records(len(self.links), self.link)
+
+    def node_id(self, handle: int) -> str:
+        return self.nodes[handle].id
+
+    def node(self, pos: int) -> dict:
+        return _pack(self.nodes[pos], self._node_encode)
+
+    def citation(self, citation_id: int) -> dict:
+        return _pack(self.citations[citation_id], self._citation_encode)
+
+    def link(self, idx: int) -> dict:
+        return _pack(self.links[idx], self._link_encode)
+
+    def link_values(self, name: str, default=None) -> list:
+        """``link.get(name, default)`` for every link, without packing the records."""
+        return [_field(link, name, self._link_encode, default) for link in self.links]
+
+    def link_citations(self, *fields: str) -> list:
+        """citation_fields() of every link's ``citations``, or None when it has none."""
+        rows = [tuple(_field(citation, field, self._citation_encode, None) for field in fields) for citation in self.citations]
+        result = []
+        for link in self.links:
+            if link.extra is not None and "citations" in link.extra:
+                result.append(link.extra["citations"])
+            elif "citations" in link.shape:
+                result.append(tuple(rows[i] for i in link.citations))
+            else:
+                result.append(None)
+        return result
+
+    def to_data(self) -> dict:
+        return with_records(self.top_level, list(self.node_records), list(self.link_records))
@@ -0,0 +1,437 @@
+"""Process-resident dataset store for the API.
+
+The dataset is parsed once and kept in memory as an immutable snapshot. A
+snapshot is replaced atomically when the file on disk changes; concurrent
+callers share a single reload instead of each re-parsing the file.
+"""
+import copy
+import gc
+import hashlib
+import json
+import logging
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from citations import CitationTable
+from encoded_payload import EncodedPayload
+from graph_index import GraphIndex
+from graph_model import GraphModel
+from papers import PaperIndex
+from recommendations import RecommendationEngine
+from search_index import SearchIndex
+from snapshot_format import CompiledGraph, is_compiled, read_version
+import sqlite_store
+from stats import compute_stats
+
+BASE_DIR = Path(__file__).resolve().parent
+
+# Minimum number of seconds between two stat() calls on the dataset file.
+RELOAD_CHECK_INTERVAL = float(os.getenv("DATA_RELOAD_INTERVAL", "2"))
+
+# Disk reads, parsing and index builds run here, never on the event loop.
+BLOCKING_WORKERS = int(os.getenv("BLOCKING_WORKERS", "4"))
+executor = ThreadPoolExecutor(max_workers=BLOCKING_WORKERS, thread_name_prefix="graph-store")
+
+logger = logging.getLogger(__name__)
+
+def resolve_data_path() -> Path | None:
+    env_path = os.getenv("DATA_PATH")
+    candidates = []
+    if env_path:
+        candidates.append(Path(env_path).expanduser())
+    candidates.extend(
+        [
+            BASE_DIR / "data" / "mvp_dataset.json",
+            BASE_DIR.parent / "frontend" / "src" / "data" / "mvp_dataset.json",
+        ]
+    )
+
+    for path in candidates:
+        if path.exists():
+            return path
+    return None
+
+
+def file_signature(path: Path | None) -> tuple | None:
+    if path is None:
+        return None
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return (str(path), stat.st_mtime_ns, stat.st_size)
+
+
+def derived(build):
+    """Snapshot attribute built on first use, then shared by every reader."""
+    name = build.__name__
+
+    def get(self):
+        cache = self._derived
+        if name not in cache:
+            with self._build_lock:
+                if name not in cache:
+                    cache[name] = build(self)
+        return cache[name]
+
+    return property(get, doc=build.__doc__)
+
+
+class GraphSnapshot:
+    """One version of the dataset. Never mutated after construction.
+
+    The records live either in a typed GraphModel (parsed from JSON) or in a
+    memory-mapped compiled snapshot; both hand out plain dicts in the
+    original JSON shape on access. Derived structures (indexes, encoded payloads, aggregates) are
+    built lazily and cached; warm() builds all of them up front.
+    """
+
+    WARM = ("index", "search", "graph_payload", "recommender", "papers", "stats_payload")
+
+    def __init__(
+        self,
+        version: str,
+        model: GraphModel | None = None,
+        compiled: CompiledGraph | None = None,
+        path: Path | None = None,
+        signature: tuple | None = None,
+    ):
+        self.version = version
+        self.compiled = compiled
+        self.path = path
+        self.signature = signature
+        self.loaded_at = time.time()
+        self.model = model
+        self._derived = {}
+        self._build_lock = threading.RLock()
+
+    def with_signature(self, path: Path | None, signature: tuple | None) -> "GraphSnapshot":
+        """Same content under a new file signature; shares everything already built."""
+        twin = copy.copy(self)
+        twin.path = path
+        twin.signature = signature
+        return twin
+
+    def built(self, name: str) -> bool:
+        """Whether the derived attribute ``name`` can be read without building it."""
+        return name in self._derived
+
+    def warm(self, names: tuple[str, ...] = WARM) -> "GraphSnapshot":
+        for name in names:
+            getattr(self, name)
+        # A full collection walks every container the snapshot holds, with the
+        # GIL held: 75 ms per snapshot at 100k links, and a reload keeps two
+        # alive. Snapshots hold no reference cycles, so there is nothing for
+        # it to find; frozen, they are skipped, and refcounting still frees
+        # them once they are released. Young garbage is collected first so
+        # that request cycles aren't frozen along with them.
+        gc.collect(1)
+        gc.freeze()
+        return self
+
+    @property
+    def nodes(self):
+        return self.compiled.nodes if self.compiled is not None else self.model.node_records
+
+    @property
+    def links(self):
+        return self.compiled.links if self.compiled is not None else self.model.link_records
+
+    @property
+    def data(self) -> dict:
+        """The whole dataset as JSON-shaped dicts, rebuilt on every call."""
+        return (self.compiled or self.model).to_data()
+
+    @derived
+    def index(self) -> GraphIndex:
+        if self.compiled is not None:
+            return GraphIndex.from_compiled(self.compiled)
+        return GraphIndex.from_model(self.model)
+
+    @derived
+    def search(self) -> SearchIndex:
+        return SearchIndex(self.nodes)
+
+    @derived
+    def graph_payload(self) -> EncodedPayload:
+        if self.compiled is not None:
+            return EncodedPayload(self.compiled.graph_json)
+        return EncodedPayload.from_json(self.data)
+
+    @derived
+    def recommender(self) -> RecommendationEngine:
+        return RecommendationEngine(self.index)
+
+    @derived
+    def papers(self) -> PaperIndex:
+        return PaperIndex(self.index)
+
+    @derived
+    def citations(self) -> CitationTable:
+        return CitationTable(self.links)
+
+    @derived
+    def normalized_payload(self) -> EncodedPayload:
+        """The graph with citations moved into a deduplicated table."""
+        return EncodedPayload.from_json(self.citations.normalized(self.nodes, self.links))
+
+    @derived
+    def stats(self) -> dict:
+        return compute_stats(self.index)
+
+    @derived
+    def stats_payload(self) -> EncodedPayload:
+        return EncodedPayload.from_json(self.stats)
+
+
+EMPTY_VERSION = hashlib.sha256(b"").hexdigest()
+
+
+def empty_snapshot() -> GraphSnapshot:
+    return build_snapshot({"nodes": [], "links": []}, EMPTY_VERSION)
+
+
+def build_snapshot(data: dict, version: str, path: Path | None = None, signature: tuple | None = None) -> GraphSnapshot:
+    return GraphSnapshot(version, model=GraphModel(data), path=path, signature=signature)
+
+
+_decoder = json.JSONDecoder()
+_whitespace = re.compile(r"[ \t\n\r]*")
+
+
+def parse_json(raw: bytes):
+    """Same result as json.loads, but arrays in a top-level object are decoded
+    one member at a time.
+
+    json.loads holds the GIL for the whole document, which stalls the event
+    loop thread for as long as a large dataset takes to parse even when the
+    parse runs in a worker thread. Per-record calls let it run in between.
+    """
+    text = raw.decode(json.detect_encoding(raw))
+    ws = _whitespace.match
+
+    def expect(char: str, idx: int) -> int:
+        if text[idx:idx + 1] != char:
+            raise json.JSONDecodeError(f"Expecting '{char}'", text, idx)
+        return ws(text, idx + 1).end()
+
+    def value(idx: int):
+        if text[idx:idx + 1] != "[":
+            return _decoder.raw_decode(text, idx)
+        items = []
+        idx = ws(text, idx + 1).end()
+        if text[idx:idx + 1] == "]":
+            return items, idx + 1
+        while True:
+            item, idx = _decoder.raw_decode(text, idx)
+            items.append(item)
+            idx = ws(text, idx).end()
+            if text[idx:idx + 1] == "]":
+                return items, idx + 1
+            idx = expect(",", idx)
+
+    idx = ws(text, 0).end()
+    if text[idx:idx + 1] != "{":
+        return json.loads(text)
+    result = {}
+    idx = ws(text, idx + 1).end()
+    if text[idx:idx + 1] == "}":
+        idx += 1
+    else:
+        while True:
+            if text[idx:idx + 1] != '"':
+                raise json.JSONDecodeError("Expecting property name enclosed in double quotes", text, idx)
+            key, idx = _decoder.raw_decode(text, idx)
+            idx = expect(":", ws(text, idx).end())
+            result[key], idx = value(idx)
+            idx = ws(text, idx).end()
+            if text[idx:idx + 1] == "}":
+                idx += 1
+                break
+            idx = expect(",", idx)
+    if ws(text, idx).end() != len(text):
+        raise json.JSONDecodeError("Extra data", text, idx)
+    return result
+
+
+def compile_in_subprocess(path: Path) -> CompiledGraph:
+    """Compile a JSON or SQLite dataset with compile_dataset.py in a child
+    process and load the result.
+
+    Parsing a large dataset allocates millions of objects; in this process the
+    parse, and the garbage collections it sets off, hold the GIL (and so stall
+    the event loop) for hundreds of milliseconds at a time, even from a worker
+    thread. The child pays for that instead.
+    """
+    with tempfile.TemporaryDirectory(prefix="bionutrigraph-") as tmp:
+        target = Path(tmp) / "snapshot.bng"
+        subprocess.run(
+            [sys.executable, str(BASE_DIR / "compile_dataset.py"), str(path), "-o", str(target)],
+            check=True,
+            stdout=subprocess.DEVNULL,
+        )
+        # Read, not mapped, so the directory can go right away.
+        return CompiledGraph(target.read_bytes())
+
+
+def read_source(path: Path, subprocess_compile: bool = False):
+    """Return the content version of a dataset file and a loader for it.
+
+    Compiled snapshots and SQLite databases carry their version, so checking
+    one for changes doesn't read the whole file. With ``subprocess_compile``,
+    JSON and SQLite sources load as compiled snapshots built by
+    compile_in_subprocess().
+    """
+    if is_compiled(path):
+        return read_version(path), lambda signature: GraphSnapshot(
+            read_version(path), compiled=CompiledGraph(path), path=path, signature=signature
+        )
+    if subprocess_compile:
+        if sqlite_store.is_sqlite(path):
+            version = sqlite_store.read_version(path)
+        else:
+            version = hashlib.sha256(path.read_bytes()).hexdigest()
+
+        def load_compiled(signature):
+            compiled = compile_in_subprocess(path)
+            # The version that was compiled, in case the file changed after it was read here.
+            return GraphSnapshot(compiled.version, compiled=compiled, path=path, signature=signature)
+
+        return version, load_compiled
+    if sqlite_store.is_sqlite(path):
+        version = sqlite_store.read_version(path)
+
+        def load_database(signature):
+            return build_snapshot(sqlite_store.read_data(path), version, path, signature)
+
+        return version, load_database
+    raw = path.read_bytes()
+    version = hashlib.sha256(raw).hexdigest()
+
+    def load(signature):
+        return build_snapshot(parse_json(raw), version, path, signature)
+
+    return version, load
+
+
+def load_snapshot(path: Path | None, subprocess_compile: bool = False) -> GraphSnapshot:
+    if path is None:
+        return empty_snapshot()
+    signature = file_signature(path)
+    _, load = read_source(path, subprocess_compile)
+    return load(signature)
+
+
+class GraphStore:
+    """Holds the current snapshot and reloads it when the dataset file changes.
+
+    Reads never block on a reload once a snapshot exists: get() hands the
+    change check (and any reload) to ``executor`` and keeps serving the
+    previous snapshot until the new one is ready.
+    """
+
+    def __init__(
+        self,
+        path_resolver=resolve_data_path,
+        check_interval: float = RELOAD_CHECK_INTERVAL,
+        on_load=None,
+        executor: ThreadPoolExecutor = executor,
+        prebuild: tuple[str, ...] = GraphSnapshot.WARM,
+        subprocess_compile: bool = True,
+    ):
+        self._resolve_path = path_resolver
+        self._check_interval = check_interval
+        self._executor = executor
+        # Load JSON and SQLite sources through compile_in_subprocess().
+        self._subprocess_compile = subprocess_compile
+        self._refresh_pending = False
+        # Called with (snapshot, seconds) after every load that publishes a new snapshot.
+        self._on_load = on_load
+        # Derived attributes built before a reloaded snapshot is published.
+        self._prebuild = prebuild
+        self._snapshot: GraphSnapshot | None = None
+        self._reload_lock = threading.Lock()
+        self._last_check = 0.0
+        self.reload_count = 0
+
+    @property
+    def snapshot(self) -> GraphSnapshot | None:
+        return self._snapshot
+
+    def get(self) -> GraphSnapshot:
+        snapshot = self._snapshot
+        if snapshot is None:
+            return self.reload()
+        if time.monotonic() - self._last_check >= self._check_interval and not self._refresh_pending:
+            self._refresh_pending = True
+            self._executor.submit(self.refresh).add_done_callback(self._refreshed)
+        return snapshot
+
+    def _refreshed(self, future) -> None:
+        self._refresh_pending = False
+        if future.exception() is not None:
+            # Keep serving the current snapshot; the next check retries.
+            logger.error("Dataset reload failed", exc_info=future.exception())
+
+    def refresh(self) -> GraphSnapshot:
+        """Reload if the file changed, unless another caller is already doing it."""
+        if self._snapshot is not None:
+            if not self._reload_lock.acquire(blocking=False):
+                return self._snapshot
+            try:
+                return self._reload_if_changed()
+            finally:
+                self._reload_lock.release()
+        return self.reload()
+
+    def reload(self, force: bool = False, warm: bool = True) -> GraphSnapshot:
+        """Block until the snapshot is up to date with the file on disk.
+
+        With ``warm=False`` the new snapshot is published before its derived
+        structures are built; they are then built on first use (or by an
+        explicit ``snapshot.warm()``). That is what startup wants: with a
+        compiled snapshot the API can serve as soon as the file is mapped.
+        """
+        with self._reload_lock:
+            if force:
+                self._last_check = 0.0
+                start = time.perf_counter()
+                fresh = load_snapshot(self._resolve_path(), self._subprocess_compile)
+                self._swap(fresh.warm(self._prebuild) if warm else fresh, time.perf_counter() - start)
+                return self._snapshot
+            return self._reload_if_changed(warm)
+
+    def _reload_if_changed(self, warm: bool = True) -> GraphSnapshot:
+        self._last_check = time.monotonic()
+        current = self._snapshot
+        path = self._resolve_path()
+        signature = file_signature(path)
+        if current is not None and signature == current.signature:
+            return current
+        if signature is None:
+            self._swap(empty_snapshot(), 0.0)
+            return self._snapshot
+
+        start = time.perf_counter()
+        version, load = read_source(path, self._subprocess_compile)
+        if current is not None and version == current.version:
+            # Touched but not modified: keep the already-built snapshot.
+            self._snapshot = current.with_signature(path, signature)
+            return self._snapshot
+        fresh = load(signature)
+        # Build everything before publishing so readers never pay for it.
+        self._swap(fresh.warm(self._prebuild) if warm else fresh, time.perf_counter() - start)
+        return self._snapshot
+
+    def _swap(self, snapshot: GraphSnapshot, seconds: float) -> None:
+        # A single attribute assignment is atomic; readers see the old or the new snapshot.
+        self._snapshot = snapshot
+        self.reload_count += 1
+        if self._on_load is not None:
+            self._on_load(snapshot, seconds)
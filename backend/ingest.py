@@ -3,9 +3,39 @@ import json
 import argparse
 from pypdf import PdfReader
 from openai import OpenAI
+from llm_cache import cache_from_env
 
-# Initialize Client - expects OPENAI_API_KEY in env
-client = OpenAI()
+MODEL = "gpt-4o"
+MAX_TEXT_CHARS = 15000
+
+_client = None
+_cache = None
+_cache_loaded = False
+
+def get_client():
+    # Created on first use (expects OPENAI_API_KEY in env) so importing this module doesn't need a key
+    global _client
+    if _client is None:
+        _client = OpenAI()
+    return _client
+
+def get_cache(offline=None, enabled=None):
+    # Configured from LLM_CACHE* env vars unless main() set it up first
+    global _cache, _cache_loaded
+    if not _cache_loaded:
+        _cache = cache_from_env(offline, enabled)
+        _cache_loaded = True
+    return _cache
+
+def chat(kind, messages, **params):
+    def call():
+        response = get_client().chat.completions.create(model=MODEL, messages=messages, **params)
+        return response.choices[0].message.content
+
+    cache = get_cache()
+    if cache is None:
+        return call()
+    return cache.complete(kind, call, MODEL, messages, **params)
 
 EXTRACTION_PROMPT = """
 You are an expert nutritional scientist and data extractor. Your task is to analyze the provided scientific text (abstract or full paper) and extract specific relationships between FOODS and BIOMARKERS.
@@ -42,55 +72,57 @@ def extract_text_from_pdf(pdf_path):
         text += page.extract_text()
     return text
 
-def process_paper(text):
-    # 1. Extract Data
-    response = client.chat.completions.create(
-        model="gpt-4o",
-        messages=[
-            {"role": "system", "content": EXTRACTION_PROMPT},
-            {"role": "user", "content": f"Analyze the following text:\n{text[:15000]}"} # Truncate for safety
-        ],
-        response_format={"type": "json_object"}
-    )
-    
+def read_paper(path):
+    if str(path).endswith(".pdf"):
+        return extract_text_from_pdf(path)
+    with open(path, "r") as f:
+        return f.read()
+
+def extraction_messages(text):
+    return [
+        {"role": "system", "content": EXTRACTION_PROMPT},
+        {"role": "user", "content": f"Analyze the following text:\n{text[:MAX_TEXT_CHARS]}"} # Truncate for safety
+    ]
+
+def parse_relationships(content):
     try:
-        data = json.loads(response.choices[0].message.content)
-        relationships = data.get("relationships", []) # Assuming structured output
-        if not relationships and isinstance(data, list):
-            relationships = data
-            
-        return relationships
+        data = json.loads(content)
+        if isinstance(data, list):
+            return data
+        return data.get("relationships", []) # Assuming structured output
     except Exception as e:
         print(f"Error parsing JSON: {e}")
         return []
 
-def generate_summary(relationship):
+def summary_messages(relationship):
     prompt = f"""
     Food: {relationship.get('food')}
     Biomarker: {relationship.get('biomarker')}
     Effect: {relationship.get('effect_direction')} ({relationship.get('magnitude')})
     Study Type: {relationship.get('study_type')}
     """
-    
-    response = client.chat.completions.create(
-        model="gpt-4o",
-        messages=[
-            {"role": "system", "content": SUMMARY_PROMPT},
-            {"role": "user", "content": prompt}
-        ]
-    )
-    return response.choices[0].message.content
+    return [
+        {"role": "system", "content": SUMMARY_PROMPT},
+        {"role": "user", "content": prompt}
+    ]
+
+def process_paper(text):
+    # 1. Extract Data
+    content = chat("extraction", extraction_messages(text), response_format={"type": "json_object"})
+    return parse_relationships(content)
+
+def generate_summary(relationship):
+    return chat("summary", summary_messages(relationship))
 
 def main():
     parser = argparse.ArgumentParser(description="Ingest a scientific paper (PDF or Text)")
     parser.add_argument("path", help="Path to PDF or Text file")
+    parser.add_argument("--offline", action="store_true", help="Answer only from the LLM cache, never call the API")
+    parser.add_argument("--no-cache", action="store_true", help="Neither read nor write the LLM cache")
     args = parser.parse_args()
+    cache = get_cache(offline=args.offline or None, enabled=False if args.no_cache else None)
     
-    if args.path.endswith(".pdf"):
-        text = extract_text_from_pdf(args.path)
-    else:
-        with open(args.path, "r") as f:
-            text = f.read()
+    text = read_paper(args.path)
             
     print(f"Extracted {len(text)} characters. analyzing...")
     
@@ -108,6 +140,9 @@ def main():
     with open(output_path, "w") as f:
         json.dump(relationships, f, indent=2)
     print(f"\nSaved to {output_path}")
+    if cache is not None:
+        print(cache.summary())
+        cache.close()
 
 if __name__ == "__main__":
     main()
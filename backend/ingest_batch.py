@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""Ingest many papers concurrently.
+
+    python ingest_batch.py papers/ "more/**/*.pdf" --concurrency 8 --papers-in-flight 8 --rpm 500 --tpm 30000 -o staging_data.json
+    OPENAI_BASE_URL=http://127.0.0.1:8400/v1 OPENAI_API_KEY=test python ingest_batch.py papers/
+
+Takes files, directories (every .pdf/.txt/.md inside, recursively) and glob
+patterns, and runs the same extraction and summary prompts as ingest.py
+through AsyncOpenAI. At most ``--papers-in-flight`` papers are read and
+processed at once (so texts aren't all loaded up front) and at most
+``--concurrency`` requests are in flight, and a limiter keeps requests and
+(estimated, then actual) tokens under the per-minute budgets. Rate-limit, timeout, connection and 5xx errors are
+retried with jittered exponential backoff, honouring Retry-After. A
+progress line is printed as each paper finishes; papers that still fail
+are reported and skipped. The client honours OPENAI_BASE_URL, so the
+whole pipeline runs against any OpenAI-compatible server (see
+benchmarks/fake_openai.py).
+
+Responses go through the LLM cache (llm_cache.py): repeated calls are
+answered from disk without touching the limiter, and ``--offline`` replays
+a run from the cache alone.
+"""
+import argparse
+import asyncio
+import glob
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+import openai
+from openai import AsyncOpenAI
+
+from ingest import MODEL, extraction_messages, parse_relationships, read_paper, summary_messages
+from llm_cache import cache_from_env
+
+PAPER_SUFFIXES = (".pdf", ".txt", ".md")
+# Rough completion sizes used until a response reports its real usage.
+EXTRACTION_COMPLETION_TOKENS = 1500
+SUMMARY_COMPLETION_TOKENS = 200
+RETRYABLE = (openai.RateLimitError, openai.APITimeoutError, openai.APIConnectionError, openai.InternalServerError)
+
+
+def find_papers(patterns: list[str]) -> list[Path]:
+    """Expand files, directories and glob patterns, in a stable order without duplicates."""
+    found: dict[Path, None] = {}
+    for pattern in patterns:
+        matches = [Path(match) for match in sorted(glob.glob(pattern, recursive=True))] or [Path(pattern)]
+        for path in matches:
+            if path.is_dir():
+                found.update(dict.fromkeys(sorted(p for p in path.rglob("*") if p.is_file() and p.suffix.lower() in PAPER_SUFFIXES)))
+            elif path.is_file():
+                found[path] = None
+            else:
+                print(f"No such file or directory: {pattern}", file=sys.stderr)
+    return list(found)
+
+
+def positive(cast):
+    """argparse type: ``cast`` the value and reject anything not above zero."""
+
+    def parse(value: str):
+        try:
+            number = cast(value)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"invalid {cast.__name__} value: {value!r}")
+        if not number > 0:
+            raise argparse.ArgumentTypeError(f"must be greater than 0, got {value}")
+        return number
+
+    return parse
+
+
+def estimate_tokens(messages: list[dict]) -> int:
+    return sum(len(message["content"]) for message in messages) // 4 + 4 * len(messages)
+
+
+class RateLimiter:
+    """Token buckets for requests and tokens per minute, refilled continuously."""
+
+    def __init__(self, rpm: float, tpm: float):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.requests = rpm
+        self.tokens = tpm
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self.updated
+        self.updated = now
+        self.requests = min(self.rpm, self.requests + elapsed * self.rpm / 60)
+        self.tokens = min(self.tpm, self.tokens + elapsed * self.tpm / 60)
+
+    async def acquire(self, tokens: int) -> None:
+        # A request bigger than the whole budget waits for a full bucket instead of forever.
+        tokens = min(tokens, self.tpm)
+        while True:
+            self._refill()
+            if self.requests >= 1 and self.tokens >= tokens:
+                self.requests -= 1
+                self.tokens -= tokens
+                return
+            wait = max((1 - self.requests) * 60 / self.rpm, (tokens - self.tokens) * 60 / self.tpm)
+            await asyncio.sleep(max(wait, 0.01))
+
+    def settle(self, estimated: int, actual: int) -> None:
+        """Charge the difference once a response reports how many tokens it used."""
+        self.tokens -= actual - estimated
+
+
+class Progress:
+    def __init__(self, total: int):
+        self.total = total
+        self.done = 0
+        self.failed = 0
+        self.relationships = 0
+        self.requests = 0
+        self.retries = 0
+        self.tokens = 0
+        self.start = time.perf_counter()
+
+    def paper(self, path: Path, count: int | None) -> None:
+        self.done += 1
+        if count is None:
+            self.failed += 1
+        else:
+            self.relationships += count
+        elapsed = time.perf_counter() - self.start
+        outcome = "failed" if count is None else f"{count} relationships"
+        print(
+            f"[{self.done}/{self.total}] {path}: {outcome} | {self.done / elapsed:.2f} papers/s, "
+            f"{self.requests} requests, {self.retries} retries, {self.tokens} tokens, {elapsed:.1f}s",
+            flush=True,
+        )
+
+
+class BatchIngester:
+    def __init__(self, client: AsyncOpenAI | None, concurrency: int, limiter: RateLimiter, progress: Progress, max_retries: int = 6, model: str = MODEL, cache=None):
+        self.client = client
+        self.cache = cache
+        self.slots = asyncio.Semaphore(concurrency)
+        self.limiter = limiter
+        self.progress = progress
+        self.max_retries = max_retries
+        self.model = model
+
+    async def complete(self, kind: str, messages: list[dict], completion_tokens: int, **kwargs) -> str | None:
+        if self.cache is None:
+            return await self.request(messages, completion_tokens, **kwargs)
+        key, content = await asyncio.to_thread(self.cache.lookup, kind, self.model, messages, **kwargs)
+        if content is None:
+            content = await self.request(messages, completion_tokens, **kwargs)
+            await asyncio.to_thread(self.cache.put, key, content, kind, self.model)
+        return content
+
+    async def request(self, messages: list[dict], completion_tokens: int, **kwargs) -> str | None:
+        estimated = estimate_tokens(messages) + completion_tokens
+        for attempt in range(self.max_retries + 1):
+            await self.limiter.acquire(estimated)
+            try:
+                async with self.slots:
+                    self.progress.requests += 1
+                    response = await self.client.chat.completions.create(model=self.model, messages=messages, **kwargs)
+            except RETRYABLE as e:
+                if attempt == self.max_retries:
+                    raise
+                self.progress.retries += 1
+                await asyncio.sleep(self.backoff(attempt, e))
+                continue
+            if response.usage is not None:
+                self.limiter.settle(estimated, response.usage.total_tokens)
+                self.progress.tokens += response.usage.total_tokens
+            return response.choices[0].message.content
+
+    @staticmethod
+    def backoff(attempt: int, error: Exception) -> float:
+        response = getattr(error, "response", None)
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        try:
+            return float(retry_after)
+        except (TypeError, ValueError):
+            # Full jitter: anywhere up to the exponential cap.
+            return random.uniform(0, min(60.0, 2.0 ** attempt))
+
+    async def summarize(self, relationship: dict) -> dict:
+        relationship["plain_language_summary"] = await self.complete("summary", summary_messages(relationship), SUMMARY_COMPLETION_TOKENS)
+        return relationship
+
+    async def ingest(self, path: Path) -> list[dict] | None:
+        try:
+            text = await asyncio.to_thread(read_paper, path)
+            content = await self.complete("extraction", extraction_messages(text), EXTRACTION_COMPLETION_TOKENS, response_format={"type": "json_object"})
+            relationships = [rel for rel in parse_relationships(content) if isinstance(rel, dict)]
+            await asyncio.gather(*(self.summarize(rel) for rel in relationships))
+        except Exception as e:
+            print(f"Error ingesting {path}: {e}", file=sys.stderr)
+            self.progress.paper(path, None)
+            return None
+        for rel in relationships:
+            rel["source_path"] = str(path)
+        self.progress.paper(path, len(relationships))
+        return relationships
+
+    async def ingest_all(self, papers: list[Path], in_flight: int) -> list[list[dict] | None]:
+        """ingest() every paper, ``in_flight`` at a time, results in input order."""
+        results: list[list[dict] | None] = [None] * len(papers)
+        pending = iter(enumerate(papers))
+
+        async def worker():
+            # Workers share one iterator, so each paper is taken exactly once.
+            for i, path in pending:
+                results[i] = await self.ingest(path)
+
+        await asyncio.gather(*(worker() for _ in range(min(in_flight, len(papers)))))
+        return results
+
+
+async def run(args) -> int:
+    papers = find_papers(args.paths)
+    if not papers:
+        print("No papers found.")
+        return 1
+    print(f"Ingesting {len(papers)} papers ...", flush=True)
+    progress = Progress(len(papers))
+    cache = cache_from_env(offline=args.offline or None, enabled=False if args.no_cache else None)
+    # Offline runs never reach the API, so they need no key.
+    client = None if cache is not None and cache.offline else AsyncOpenAI(base_url=args.base_url, max_retries=0, timeout=args.timeout)
+    try:
+        ingester = BatchIngester(client, args.concurrency, RateLimiter(args.rpm, args.tpm), progress, args.max_retries, cache=cache)
+        results = await ingester.ingest_all(papers, args.papers_in_flight or args.concurrency)
+    finally:
+        if client is not None:
+            await client.close()
+        if cache is not None:
+            cache.close()
+
+    relationships = [rel for result in results if result for rel in result]
+    with open(args.output, "w") as f:
+        json.dump(relationships, f, indent=2)
+    elapsed = time.perf_counter() - progress.start
+    print(
+        f"\n{progress.done - progress.failed}/{len(papers)} papers, {len(relationships)} relationships in {elapsed:.1f}s "
+        f"({progress.requests} requests, {progress.retries} retries, {progress.tokens} tokens)"
+    )
+    print(f"Saved to {args.output}")
+    if cache is not None:
+        print(cache.summary())
+    return 1 if progress.failed else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest many scientific papers (PDF or Text) concurrently")
+    parser.add_argument("paths", nargs="+", help="Files, directories or glob patterns")
+    parser.add_argument("-o", "--output", default="staging_data.json")
+    parser.add_argument("--concurrency", type=positive(int), default=8, help="Requests in flight at once")
+    parser.add_argument("--papers-in-flight", type=positive(int), default=None, help="Papers processed at once (default: --concurrency)")
+    parser.add_argument("--rpm", type=positive(float), default=500, help="Requests per minute")
+    parser.add_argument("--tpm", type=positive(float), default=30000, help="Tokens per minute")
+    parser.add_argument("--max-retries", type=int, default=6)
+    parser.add_argument("--timeout", type=float, default=120, help="Seconds per request")
+    parser.add_argument("--base-url", default=None, help="OpenAI-compatible API base URL (default: OPENAI_BASE_URL or OpenAI)")
+    parser.add_argument("--offline", action="store_true", help="Answer only from the LLM cache, never call the API")
+    parser.add_argument("--no-cache", action="store_true", help="Neither read nor write the LLM cache")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(run(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""Content-addressed on-disk cache for LLM calls.
+
+    python llm_cache.py stats
+    python llm_cache.py evict --max-mb 256 --max-age-days 30
+    python llm_cache.py clear
+
+Each entry is keyed by the sha256 of the model, the full message list
+(system prompt and input) and any other request parameters, so editing one
+prompt only misses for the calls that use it. Entries live in a SQLite
+file (LLM_CACHE_PATH); the least recently used are evicted beyond
+LLM_CACHE_MAX_MB and entries older than LLM_CACHE_MAX_AGE_DAYS are dropped.
+In offline mode (LLM_CACHE_OFFLINE=1) a miss raises CacheMiss instead of
+calling the API, so a run can be replayed entirely from the cache.
+"""
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent
+DEFAULT_PATH = BASE_DIR / "data" / "llm_cache.sqlite3"
+# Puts between two eviction passes.
+EVICT_EVERY = 100
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    model TEXT NOT NULL,
+    content TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed);
+CREATE INDEX IF NOT EXISTS entries_created ON entries (created);
+"""
+
+
+class CacheMiss(Exception):
+    """An offline cache has no entry for this call."""
+
+
+def cache_key(model: str, messages: list[dict], **params) -> str:
+    request = {"model": model, "messages": messages, **params}
+    return hashlib.sha256(json.dumps(request, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    def __init__(self, path: Path = DEFAULT_PATH, max_bytes: int | None = None, max_age: float | None = None, offline: bool = False):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.offline = offline
+        self.hits: dict[str, int] = {}
+        self.misses: dict[str, int] = {}
+        self._puts = 0
+        # One connection shared by every thread (asyncio.to_thread callers included).
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._con = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._con.execute("PRAGMA journal_mode=WAL")
+        self._con.executescript(SCHEMA)
+        self.evict()
+
+    def get(self, key: str, kind: str = "") -> str | None:
+        with self._lock:
+            row = self._con.execute("SELECT content FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                self._con.execute("UPDATE entries SET accessed = ? WHERE key = ?", (time.time(), key))
+        counts = self.misses if row is None else self.hits
+        counts[kind] = counts.get(kind, 0) + 1
+        return None if row is None else row[0]
+
+    def put(self, key: str, content: str | None, kind: str = "", model: str = "") -> None:
+        if content is None:
+            # Refusals and tool calls have no content; they are not cached.
+            return
+        now = time.time()
+        with self._lock:
+            self._con.execute(
+                "INSERT OR REPLACE INTO entries (key, kind, model, content, size, created, accessed) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, kind, model, content, len(content.encode("utf-8")), now, now),
+            )
+            self._puts += 1
+            due = self._puts % EVICT_EVERY == 0
+        if due:
+            self.evict()
+
+    def lookup(self, kind: str, model: str, messages: list[dict], **params) -> tuple[str, str | None]:
+        """The key for a call and its cached content; raises CacheMiss offline."""
+        key = cache_key(model, messages, **params)
+        content = self.get(key, kind)
+        if content is None and self.offline:
+            raise CacheMiss(f"No cached {kind or 'LLM'} response (offline mode)")
+        return key, content
+
+    def complete(self, kind: str, call, model: str, messages: list[dict], **params) -> str | None:
+        """``call()``'s content, from the cache when the same request was made before.
+
+        A None content is returned as is and never cached.
+        """
+        key, content = self.lookup(kind, model, messages, **params)
+        if content is None:
+            content = call()
+            self.put(key, content, kind, model)
+        return content
+
+    def evict(self, max_bytes: int | None = None, max_age: float | None = None) -> int:
+        """Drop expired entries, then the least recently used until under the size cap."""
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        max_age = self.max_age if max_age is None else max_age
+        removed = 0
+        with self._lock:
+            if max_age:
+                removed += self._con.execute("DELETE FROM entries WHERE created < ?", (time.time() - max_age,)).rowcount
+            if max_bytes:
+                (total,) = self._con.execute("SELECT coalesce(sum(size), 0) FROM entries").fetchone()
+                if total > max_bytes:
+                    excess, doomed = total - max_bytes, []
+                    for key, size in self._con.execute("SELECT key, size FROM entries ORDER BY accessed"):
+                        if excess <= 0:
+                            break
+                        doomed.append((key,))
+                        excess -= size
+                    self._con.executemany("DELETE FROM entries WHERE key = ?", doomed)
+                    removed += len(doomed)
+        return removed
+
+    def clear(self) -> int:
+        with self._lock:
+            return self._con.execute("DELETE FROM entries").rowcount
+
+    def stats(self) -> dict:
+        with self._lock:
+            kinds = {
+                kind: {"entries": count, "bytes": size}
+                for kind, count, size in self._con.execute("SELECT kind, count(*), sum(size) FROM entries GROUP BY kind")
+            }
+            oldest, newest = self._con.execute("SELECT min(created), max(created) FROM entries").fetchone()
+        return {
+            "entries": sum(k["entries"] for k in kinds.values()),
+            "bytes": sum(k["bytes"] for k in kinds.values()),
+            "kinds": kinds,
+            "oldest": oldest,
+            "newest": newest,
+            "hits": dict(self.hits),
+            "misses": dict(self.misses),
+        }
+
+    def summary(self) -> str:
+        hits, misses = sum(self.hits.values()), sum(self.misses.values())
+        rate = hits / (hits + misses) if hits + misses else 0.0
+        return f"LLM cache: {hits} hits, {misses} misses ({rate:.0%} hit rate)"
+
+    def close(self) -> None:
+        self.evict()
+        self._con.close()
+
+
+def cache_from_env(offline: bool | None = None, enabled: bool | None = None) -> LLMCache | None:
+    """The cache configured by LLM_CACHE* env vars, or None when disabled."""
+    if enabled is None:
+        enabled = os.getenv("LLM_CACHE", "1") != "0"
+    if offline is None:
+        offline = os.getenv("LLM_CACHE_OFFLINE", "0") == "1"
+    if not enabled:
+        if offline:
+            raise ValueError("Offline mode needs the LLM cache")
+        return None
+    max_mb = float(os.getenv("LLM_CACHE_MAX_MB", "512"))
+    max_age_days = float(os.getenv("LLM_CACHE_MAX_AGE_DAYS", "0"))
+    return LLMCache(
+        Path(os.getenv("LLM_CACHE_PATH") or DEFAULT_PATH).expanduser(),
+        max_bytes=int(max_mb * 1024 * 1024) or None,
+        max_age=max_age_days * 86400 or None,
+        offline=offline,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or trim the LLM response cache")
+    parser.add_argument("command", choices=("stats", "evict", "clear"))
+    parser.add_argument("--max-mb", type=float, default=None, help="Evict least recently used entries beyond this size")
+    parser.add_argument("--max-age-days", type=float, default=None, help="Evict entries older than this")
+    args = parser.parse_args()
+
+    cache = cache_from_env(offline=False, enabled=True)
+    if args.command == "evict":
+        removed = cache.evict(
+            None if args.max_mb is None else int(args.max_mb * 1024 * 1024),
+            None if args.max_age_days is None else args.max_age_days * 86400,
+        )
+        print(f"Evicted {removed} entries")
+    elif args.command == "clear":
+        print(f"Removed {cache.clear()} entries")
+    print(json.dumps(cache.stats(), indent=2))
+    cache.close()
+
+
+if __name__ == "__main__":
+    main()
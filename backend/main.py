@@ -1,10 +1,34 @@
-import json
 import os
-from pathlib import Path
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from typing import Literal
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
+import ndjson
+import metrics
+import profiling
+from recommendations import DEFAULT_DIRECTION
+from storage import Unsupported, create_storage
 
-app = FastAPI(title="BioNutriGraph API")
+storage = create_storage(on_load=metrics.registry.observe_load)
+# None with STORAGE_BACKEND=neo4j, which keeps no snapshot.
+store = storage.store
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await storage.start()
+    yield
+    await storage.close()
+
+
+app = FastAPI(title="BioNutriGraph API", lifespan=lifespan)
+
+
+@app.exception_handler(Unsupported)
+async def unsupported_handler(request: Request, exc: Unsupported):
+    return JSONResponse(status_code=501, content={"detail": str(exc)})
 
 # Comma-separated list of allowed frontend origins (e.g. https://site.netlify.app,https://www.site.com).
 cors_origins = os.getenv("CORS_ORIGINS", "http://localhost:5173")
@@ -19,63 +43,142 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Cross-origin clients can only read response headers listed here.
+    expose_headers=["X-Total-Count", "ETag"],
 )
-
-BASE_DIR = Path(__file__).resolve().parent
-
-
-def resolve_data_path() -> Path | None:
-    env_path = os.getenv("DATA_PATH")
-    candidates = []
-    if env_path:
-        candidates.append(Path(env_path).expanduser())
-    candidates.extend(
-        [
-            BASE_DIR / "data" / "mvp_dataset.json",
-            BASE_DIR.parent / "frontend" / "src" / "data" / "mvp_dataset.json",
-        ]
-    )
-
-    for path in candidates:
-        if path.exists():
-            return path
-    return None
-
-def get_graph_data():
-    data_path = resolve_data_path()
-    if not data_path:
-        return {"nodes": [], "links": []}
-    with data_path.open("r", encoding="utf-8") as f:
-        return json.load(f)
+# Outermost, so latency includes CORS handling.
+app.add_middleware(metrics.MetricsMiddleware)
+if profiling.ENABLED:
+    app.add_middleware(profiling.ProfilingMiddleware)
 
 @app.get("/")
 async def root():
     return {"message": "BioNutriGraph API is running (JSON Mode)"}
 
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/graph")
-async def get_graph():
-    return get_graph_data()
+async def get_graph(request: Request, citations: Literal["inline", "normalized"] = "inline"):
+    if ndjson.MEDIA_TYPE in request.headers.get("accept", ""):
+        return await stream_graph()
+    payload = await storage.graph_payload(citations)
+    response = payload.response(request)
+    response.headers["Vary"] = "Accept, Accept-Encoding"
+    return response
+
+@app.get("/graph/stream")
+async def stream_graph():
+    return StreamingResponse(ndjson.chunks(await storage.snapshot()), media_type=ndjson.MEDIA_TYPE)
+
+@app.get("/stats")
+async def get_stats(request: Request):
+    return (await storage.derived("stats_payload")).response(request)
 
 @app.get("/search")
-async def search_nodes(q: str):
-    data = get_graph_data()
-    results = [
-        node for node in data.get("nodes", []) 
-        if q.lower() in node.get("label", "").lower()
-    ]
+async def search_nodes(
+    response: Response,
+    q: str,
+    limit: int = Query(50, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+    type: str | None = None,
+    group: str | None = None,
+    mode: Literal["label", "text"] = "label",
+):
+    # "label" matches label substrings; "text" is full-text search over labels,
+    # descriptions and link summaries (SQLite backend only).
+    search = storage.text_search if mode == "text" else storage.search
+    results, total = await search(q, limit, offset, type, group)
+    response.headers["X-Total-Count"] = str(total)
     return results
 
+@app.get("/recommendations")
+async def get_recommendations(
+    biomarkers: list[str] = Query(..., description="Biomarker ids, optionally suffixed with :increase or :decrease"),
+    limit: int = Query(20, ge=1, le=500),
+    limit_avoid: int = Query(6, ge=0, le=100),
+):
+    goals = []
+    for goal in biomarkers:
+        bio_id, _, direction = goal.partition(":")
+        direction = direction or DEFAULT_DIRECTION
+        if direction not in ("increase", "decrease"):
+            raise HTTPException(status_code=422, detail=f"Unknown direction: {direction}")
+        goals.append((bio_id, direction))
+    return (await storage.derived("recommender")).recommend(goals, limit=limit, limit_avoid=limit_avoid)
+
+@app.get("/papers")
+async def list_papers(
+    response: Response,
+    q: str | None = None,
+    year: int | None = None,
+    year_from: int | None = None,
+    year_to: int | None = None,
+    type: str | None = None,
+    limit: int = Query(50, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+):
+    if year is not None:
+        year_from = year_to = year
+    papers, total = (await storage.derived("papers")).query(
+        q, year_from=year_from, year_to=year_to, paper_type=type, limit=limit, offset=offset
+    )
+    response.headers["X-Total-Count"] = str(total)
+    return papers
+
+@app.get("/papers/{key:path}")
+async def get_paper(key: str):
+    paper = (await storage.derived("papers")).get(key)
+    if not paper:
+        raise HTTPException(status_code=404, detail="Paper not found")
+    return paper
+
+@app.get("/subgraph")
+async def get_subgraph(
+    seed: list[str] = Query(...),
+    depth: int = Query(1, ge=0, le=6),
+    max_nodes: int = Query(500, ge=1, le=10000),
+    type: list[str] | None = Query(None),
+    group: list[str] | None = Query(None),
+    effect: list[str] | None = Query(None),
+    strength: list[str] | None = Query(None),
+):
+    result = await storage.subgraph(
+        seed, depth, max_nodes, {"type": type, "group": group}, {"effect": effect, "strength": strength}
+    )
+    if result is None:
+        raise HTTPException(status_code=404, detail="Node not found")
+    return result
+
+class NodeBatchRequest(BaseModel):
+    ids: list[str] = Field(..., max_length=1000)
+    expand: Literal["neighbors"] | None = None
+
+@app.post("/nodes:batch")
+async def get_nodes_batch(body: NodeBatchRequest):
+    index = await storage.derived("index")
+    requested = list(dict.fromkeys(body.ids))
+    found, missing = [], []
+    neighbors: dict[int, None] = {}
+    for node_id in requested:
+        pos = index.position.get(node_id)
+        if pos is None:
+            missing.append(node_id)
+            continue
+        found.append({"node": index.nodes[pos], "links": [index.links[i] for i in index.link_ids(pos)]})
+        if body.expand == "neighbors":
+            neighbors.update(dict.fromkeys(index.neighbors(pos)))
+
+    result = {"nodes": found, "missing": missing}
+    if body.expand == "neighbors":
+        requested_positions = {index.position[node_id] for node_id in requested if node_id in index.position}
+        result["neighbors"] = [index.nodes[pos] for pos in neighbors if pos not in requested_positions]
+    return result
+
 @app.get("/node/{node_id}")
 async def get_node_details(node_id: str):
-    data = get_graph_data()
-    node = next((n for n in data.get("nodes", []) if n["id"] == node_id), None)
-    if not node:
+    details = await storage.node_details(node_id)
+    if details is None:
         raise HTTPException(status_code=404, detail="Node not found")
-    
-    # Get related links
-    related_links = [
-        link for link in data.get("links", [])
-        if link["source"] == node_id or link["target"] == node_id
-    ]
-    
-    return {"node": node, "links": related_links}
+    return details
@@ -0,0 +1,147 @@
+"""Prometheus-style metrics without external dependencies.
+
+A pure ASGI middleware records per-route request counts, latency and
+response-size histograms and an in-flight gauge; GraphStore reports dataset
+load durations. ``render()`` produces the text exposition format served at
+/metrics.
+"""
+import threading
+import time
+from bisect import bisect_left
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+LOAD_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Histogram:
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def lines(self, name: str, labels: str) -> list[str]:
+        sep = "," if labels else ""
+        out = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            out.append(f'{name}_bucket{{{labels}{sep}le="{bound}"}} {cumulative}')
+        out.append(f'{name}_bucket{{{labels}{sep}le="+Inf"}} {self.count}')
+        suffix = f"{{{labels}}}" if labels else ""
+        out.append(f"{name}_sum{suffix} {self.sum}")
+        out.append(f"{name}_count{suffix} {self.count}")
+        return out
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests: dict[tuple, int] = {}
+        self.latency: dict[str, Histogram] = {}
+        self.sizes: dict[str, Histogram] = {}
+        self.in_flight = 0
+        self.loads = Histogram(LOAD_BUCKETS)
+        self.snapshot = None
+
+    def observe_request(self, route: str, method: str, status: int, seconds: float, size: int) -> None:
+        with self._lock:
+            key = (route, method, status)
+            self.requests[key] = self.requests.get(key, 0) + 1
+            self.latency.setdefault(route, Histogram(LATENCY_BUCKETS)).observe(seconds)
+            self.sizes.setdefault(route, Histogram(SIZE_BUCKETS)).observe(size)
+
+    def observe_load(self, snapshot, seconds: float) -> None:
+        with self._lock:
+            self.loads.observe(seconds)
+            self.snapshot = snapshot
+
+    def render(self) -> str:
+        with self._lock:
+            lines = [
+                "# HELP http_requests_total Requests handled, by route template, method and status.",
+                "# TYPE http_requests_total counter",
+            ]
+            for (route, method, status), count in sorted(self.requests.items()):
+                lines.append(f'http_requests_total{{route="{_escape(route)}",method="{method}",status="{status}"}} {count}')
+
+            lines += ["# HELP http_request_duration_seconds Request latency.", "# TYPE http_request_duration_seconds histogram"]
+            for route, histogram in sorted(self.latency.items()):
+                lines += histogram.lines("http_request_duration_seconds", f'route="{_escape(route)}"')
+
+            lines += ["# HELP http_response_size_bytes Response body size.", "# TYPE http_response_size_bytes histogram"]
+            for route, histogram in sorted(self.sizes.items()):
+                lines += histogram.lines("http_response_size_bytes", f'route="{_escape(route)}"')
+
+            lines += [
+                "# HELP http_requests_in_flight Requests currently being handled.",
+                "# TYPE http_requests_in_flight gauge",
+                f"http_requests_in_flight {self.in_flight}",
+                "# HELP dataset_load_duration_seconds Time to load (and index) a dataset snapshot.",
+                "# TYPE dataset_load_duration_seconds histogram",
+                *self.loads.lines("dataset_load_duration_seconds", ""),
+            ]
+
+            snapshot = self.snapshot
+            if snapshot is not None:
+                lines += [
+                    "# HELP dataset_snapshot_info The snapshot currently served.",
+                    "# TYPE dataset_snapshot_info gauge",
+                    f'dataset_snapshot_info{{version="{snapshot.version}"}} 1',
+                    "# HELP dataset_snapshot_loaded_timestamp_seconds When the current snapshot was loaded.",
+                    "# TYPE dataset_snapshot_loaded_timestamp_seconds gauge",
+                    f"dataset_snapshot_loaded_timestamp_seconds {snapshot.loaded_at}",
+                    "# HELP dataset_nodes Nodes in the current snapshot.",
+                    "# TYPE dataset_nodes gauge",
+                    f"dataset_nodes {len(snapshot.nodes)}",
+                    "# HELP dataset_links Links in the current snapshot.",
+                    "# TYPE dataset_links gauge",
+                    f"dataset_links {len(snapshot.links)}",
+                ]
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+
+class MetricsMiddleware:
+    def __init__(self, app, registry: Registry = registry):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        self.registry.in_flight += 1
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.registry.in_flight -= 1
+            # FastAPI stores the matched route in the scope; label by its template.
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            self.registry.observe_request(route, scope.get("method", ""), status, elapsed, size)
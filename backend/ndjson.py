@@ -0,0 +1,34 @@
+"""Newline-delimited JSON export of a snapshot.
+
+The first record describes the snapshot, then every node, then every link,
+one JSON object per line. Lines are batched into chunks of roughly
+``chunk_size`` bytes so the server yields (and can be paused by a slow
+client) at a steady granularity instead of per record or all at once.
+"""
+from collections.abc import Iterator
+
+from encoded_payload import dumps
+from graph_store import GraphSnapshot
+
+MEDIA_TYPE = "application/x-ndjson"
+CHUNK_SIZE = 64 * 1024
+
+
+def records(snapshot: GraphSnapshot) -> Iterator[bytes]:
+    yield dumps({"meta": {"version": snapshot.version, "nodes": len(snapshot.nodes), "links": len(snapshot.links)}})
+    for node in snapshot.nodes:
+        yield dumps({"node": node})
+    for link in snapshot.links:
+        yield dumps({"link": link})
+
+
+def chunks(snapshot: GraphSnapshot, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    buffer = bytearray()
+    for record in records(snapshot):
+        buffer += record
+        buffer += b"\n"
+        if len(buffer) >= chunk_size:
+            yield bytes(buffer)
+            buffer.clear()
+    if buffer:
+        yield bytes(buffer)
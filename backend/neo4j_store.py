@@ -0,0 +1,261 @@
+"""Neo4j query layer for the API.
+
+Graph shape (written by seed_db.py):
+
+* ``(:Food)`` / ``(:Biomarker)`` nodes with ``id`` (uniquely constrained),
+  ``type``, ``group``, ``search_label`` (the normalized label), ``pos`` (the
+  dataset position) and ``record`` (the exact JSON record);
+* ``[:INCREASES]`` / ``[:DECREASES]`` relationships (``[:AFFECTS]`` for any
+  other effect) with ``idx``, ``effect``, ``strength`` and ``record``;
+* on both, a ``hash`` of everything but the position (and a ``key`` on
+  relationships) that ``seed_db.py --mode sync`` diffs against;
+* one ``(:Dataset {key: 'current'})`` node whose ``version`` changes with
+  every seeding and invalidates cached results.
+
+Every query is parameterized and looks nodes up by label and ``id`` so it
+hits the uniqueness-constraint indexes. Queries are named; ``Neo4jRunner``
+sends them to the database over one pooled async driver, while
+``StandInRunner`` answers the same names from an in-memory dataset so the
+backend can run (and be tested) without a Neo4j server.
+"""
+import hashlib
+import json
+
+from search_index import normalize
+
+LABELS = {"food": "Food", "biomarker": "Biomarker"}
+RELATIONSHIPS = {"increase": "INCREASES", "decrease": "DECREASES"}
+OTHER_RELATIONSHIP = "AFFECTS"
+LINK_TYPES = "|".join([*RELATIONSHIPS.values(), OTHER_RELATIONSHIP])
+
+SCHEMA = [
+    "CREATE CONSTRAINT food_id IF NOT EXISTS FOR (n:Food) REQUIRE n.id IS UNIQUE",
+    "CREATE CONSTRAINT biomarker_id IF NOT EXISTS FOR (n:Biomarker) REQUIRE n.id IS UNIQUE",
+    "CREATE CONSTRAINT dataset_key IF NOT EXISTS FOR (d:Dataset) REQUIRE d.key IS UNIQUE",
+    "CREATE TEXT INDEX food_search IF NOT EXISTS FOR (n:Food) ON (n.search_label)",
+    "CREATE TEXT INDEX biomarker_search IF NOT EXISTS FOR (n:Biomarker) ON (n.search_label)",
+]
+
+# Resolves each row's ``id`` through both constraint indexes.
+_BY_ID = """
+    CALL {
+        WITH id MATCH (n:Food {id: id}) RETURN n
+        UNION
+        WITH id MATCH (n:Biomarker {id: id}) RETURN n
+    }
+"""
+
+QUERIES = {
+    "version": "MATCH (d:Dataset {key: 'current'}) RETURN d.version AS version",
+    "nodes": """
+        MATCH (n) WHERE n:Food OR n:Biomarker
+        RETURN n.record AS record ORDER BY n.pos
+    """,
+    "links": f"""
+        MATCH (:Food|Biomarker)-[r:{LINK_TYPES}]->(:Food|Biomarker)
+        RETURN r.record AS record ORDER BY r.idx
+    """,
+    "lookup": f"""
+        UNWIND $ids AS id
+        {_BY_ID}
+        RETURN id, n.record AS record
+    """,
+    "node_links": f"""
+        WITH $id AS id
+        {_BY_ID}
+        MATCH (n)-[r:{LINK_TYPES}]-()
+        WITH DISTINCT r
+        RETURN r.record AS record ORDER BY r.idx
+    """,
+    "search": """
+        CALL {
+            MATCH (n:Food) WHERE n.search_label CONTAINS $q RETURN n
+            UNION
+            MATCH (n:Biomarker) WHERE n.search_label CONTAINS $q RETURN n
+        }
+        WITH n WHERE ($type IS NULL OR n.type = $type) AND ($group IS NULL OR n.group = $group)
+        WITH n, CASE WHEN n.search_label = $q THEN 0 WHEN n.search_label STARTS WITH $q THEN 1 ELSE 2 END AS rank
+        ORDER BY rank, size(n.search_label), n.pos
+        WITH collect(n.record) AS records
+        RETURN size(records) AS total, records[$offset..$offset + $limit] AS page
+    """,
+    "expand": f"""
+        UNWIND $ids AS id
+        {_BY_ID}
+        MATCH (n)-[r:{LINK_TYPES}]-(m)
+        WHERE ($effects IS NULL OR r.effect IN $effects) AND ($strengths IS NULL OR r.strength IN $strengths)
+        RETURN id, r.idx AS idx, m.id AS other, m.record AS record
+        ORDER BY idx
+    """,
+    "induced": f"""
+        UNWIND $ids AS id
+        {_BY_ID}
+        MATCH (n)-[r:{LINK_TYPES}]->(m)
+        WHERE m.id IN $ids
+          AND ($effects IS NULL OR r.effect IN $effects) AND ($strengths IS NULL OR r.strength IN $strengths)
+        RETURN r.record AS record ORDER BY r.idx
+    """,
+}
+
+
+class Neo4jRunner:
+    """Runs named queries on one long-lived async driver (and its connection pool)."""
+
+    def __init__(self, uri: str, auth: tuple[str, str], pool_size: int = 50, database: str | None = None):
+        from neo4j import AsyncGraphDatabase
+
+        self.driver = AsyncGraphDatabase.driver(uri, auth=auth, max_connection_pool_size=pool_size)
+        self.database = database
+
+    async def start(self) -> None:
+        await self.driver.verify_connectivity()
+
+    async def run(self, name: str, **params) -> list[dict]:
+        from neo4j import RoutingControl
+
+        records, _, _ = await self.driver.execute_query(
+            QUERIES[name], parameters_=params, routing_=RoutingControl.READ, database_=self.database
+        )
+        return [record.data() for record in records]
+
+    async def close(self) -> None:
+        await self.driver.close()
+
+
+class StandInRunner:
+    """Answers the named queries from a dataset held in memory.
+
+    Mirrors what seeding keeps: nodes of a known type with a unique id, and
+    links between such nodes.
+    """
+
+    def __init__(self, data: dict, version: str):
+        self.version = version
+        self.nodes = {}
+        for pos, node in enumerate(data.get("nodes", [])):
+            if node.get("type") in LABELS and isinstance(node.get("id"), str):
+                self.nodes.setdefault(node["id"], (pos, node))
+        self.links = [
+            (idx, link)
+            for idx, link in enumerate(data.get("links", []))
+            if link.get("source") in self.nodes and link.get("target") in self.nodes
+        ]
+
+    async def start(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+    @staticmethod
+    def _dump(record: dict) -> str:
+        return json.dumps(record, ensure_ascii=False)
+
+    def _link_filter(self, effects, strengths):
+        return lambda link: (effects is None or link.get("effect") in effects) and (
+            strengths is None or link.get("strength") in strengths
+        )
+
+    async def run(self, name: str, **params) -> list[dict]:
+        dump = self._dump
+        if name == "version":
+            return [{"version": self.version}]
+        if name == "nodes":
+            return [{"record": dump(node)} for _, node in sorted(self.nodes.values(), key=lambda item: item[0])]
+        if name == "links":
+            return [{"record": dump(link)} for _, link in self.links]
+        if name == "lookup":
+            return [{"id": i, "record": dump(self.nodes[i][1])} for i in params["ids"] if i in self.nodes]
+        if name == "node_links":
+            node_id = params["id"]
+            if node_id not in self.nodes:
+                return []
+            return [{"record": dump(link)} for _, link in self.links if node_id in (link["source"], link["target"])]
+        if name == "search":
+            q = params["q"]
+            matches = []
+            for pos, node in self.nodes.values():
+                label = normalize(node.get("label", "")) if isinstance(node.get("label"), str) else ""
+                if q not in label:
+                    continue
+                if params["type"] is not None and node.get("type") != params["type"]:
+                    continue
+                if params["group"] is not None and node.get("group") != params["group"]:
+                    continue
+                rank = 0 if label == q else 1 if label.startswith(q) else 2
+                matches.append(((rank, len(label), pos), node))
+            matches.sort(key=lambda item: item[0])
+            records = [dump(node) for _, node in matches]
+            return [{"total": len(records), "page": records[params["offset"]:params["offset"] + params["limit"]]}]
+        if name == "expand":
+            accept = self._link_filter(params["effects"], params["strengths"])
+            rows = []
+            for node_id in params["ids"]:
+                if node_id not in self.nodes:
+                    continue
+                for idx, link in self.links:
+                    if node_id not in (link["source"], link["target"]) or not accept(link):
+                        continue
+                    other = link["target"] if link["source"] == node_id else link["source"]
+                    rows.append({"id": node_id, "idx": idx, "other": other, "record": dump(self.nodes[other][1])})
+            rows.sort(key=lambda row: row["idx"])
+            return rows
+        if name == "induced":
+            accept = self._link_filter(params["effects"], params["strengths"])
+            ids = set(params["ids"])
+            return [
+                {"record": dump(link)}
+                for _, link in self.links
+                if link["source"] in ids and link["target"] in ids and accept(link)
+            ]
+        raise KeyError(name)
+
+
+def content_hash(value) -> str:
+    return hashlib.sha256(json.dumps(value, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def relationship_type(link: dict) -> str:
+    return RELATIONSHIPS.get(link.get("effect"), OTHER_RELATIONSHIP)
+
+
+def node_properties(node: dict, pos: int) -> dict:
+    """Properties seed_db.py stores on a node."""
+    props = {
+        "id": node["id"],
+        "type": node.get("type"),
+        "group": node.get("group"),
+        "label": node.get("label"),
+        "search_label": normalize(node["label"]) if isinstance(node.get("label"), str) else "",
+        "pos": pos,
+        "record": json.dumps(node, ensure_ascii=False),
+    }
+    props["hash"] = content_hash({**props, "pos": None})
+    return props
+
+
+def link_keys(links: list[dict]) -> list[str]:
+    """A stable identity per link: its content hash, numbered among identical links."""
+    seen: dict[str, int] = {}
+    keys = []
+    for link in links:
+        digest = content_hash(link)
+        seen[digest] = seen.get(digest, 0) + 1
+        keys.append(f"{digest}:{seen[digest]}")
+    return keys
+
+
+def link_properties(link: dict, idx: int, key: str) -> dict:
+    """Properties seed_db.py stores on a relationship."""
+    props = {
+        "key": key,
+        "idx": idx,
+        "effect": link.get("effect"),
+        "strength": link.get("strength"),
+        "magnitude": link.get("magnitude"),
+        "timeframe": link.get("timeframe"),
+        "summary": link.get("summary"),
+        "record": json.dumps(link, ensure_ascii=False),
+    }
+    props["hash"] = content_hash({**props, "idx": None})
+    return props
@@ -0,0 +1,103 @@
+"""Inverted citation index: paper -> the food/biomarker links that cite it.
+
+Mirrors the aggregation ResearchPapers.tsx does in the browser: papers are
+keyed by ``doi or title`` and sorted newest first, then by title.
+"""
+import hashlib
+
+from graph_index import GraphIndex
+
+
+def paper_key(doi: str | None, title: str | None) -> str:
+    return doi or title or ""
+
+
+def paper_id(key: str) -> str:
+    # Keys are DOIs, URLs or titles; the id is a path-safe stand-in for them.
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:12]
+
+
+class PaperIndex:
+    def __init__(self, index: GraphIndex):
+        labels: dict[int, str] = {}
+
+        def label(pos: int, node_id: str) -> str:
+            if pos < 0:
+                return node_id
+            if pos not in labels:
+                labels[pos] = index.nodes[pos].get("label", node_id)
+            return labels[pos]
+
+        # Only the fields used here are read, never whole link records.
+        sources, targets = index.link_values("source"), index.link_values("target")
+        summaries = index.link_values("summary", "")
+        papers: dict[str, dict] = {}
+        for link_idx, citations in enumerate(index.link_citations("title", "year", "doi", "type")):
+            if not isinstance(citations, tuple):
+                # None, or a ``citations`` value that isn't a list of citation records.
+                continue
+            for title, year, doi, paper_type in citations:
+                key = paper_key(doi, title)
+                paper = papers.get(key)
+                if paper is None:
+                    paper = papers[key] = {
+                        "id": paper_id(key),
+                        "key": key,
+                        "title": title,
+                        # Years sort and filter as numbers; anything else counts as missing.
+                        "year": year if isinstance(year, int) and not isinstance(year, bool) else None,
+                        "doi": doi,
+                        "type": paper_type,
+                        "connections": [],
+                    }
+                paper["connections"].append(
+                    {
+                        "food": label(index.sources[link_idx], sources[link_idx]),
+                        "biomarker": label(index.targets[link_idx], targets[link_idx]),
+                        "summary": summaries[link_idx],
+                    }
+                )
+
+        self.papers = sorted(
+            papers.values(),
+            key=lambda p: (-(p["year"] or 0), (p["title"] or "").casefold(), p["title"] or ""),
+        )
+        self.by_key = {paper["key"]: paper for paper in self.papers}
+        self.by_id = {paper["id"]: paper for paper in self.papers}
+        # Lowercased text per searchable field, joined so a query can't span two fields.
+        self.haystacks = []
+        for paper in self.papers:
+            fields = [paper["title"]]
+            for connection in paper["connections"]:
+                fields.extend((connection["food"], connection["biomarker"], connection["summary"]))
+            self.haystacks.append("\n".join((field or "").lower() for field in fields))
+
+    def get(self, key: str) -> dict | None:
+        """Look a paper up by its short id or its full key."""
+        return self.by_id.get(key) or self.by_key.get(key)
+
+    def query(
+        self,
+        q: str | None = None,
+        year_from: int | None = None,
+        year_to: int | None = None,
+        paper_type: str | None = None,
+        limit: int | None = None,
+        offset: int = 0,
+    ) -> tuple[list[dict], int]:
+        """Return one page of matching papers and the total number of matches."""
+        q = (q or "").lower()
+        matches = []
+        for paper, haystack in zip(self.papers, self.haystacks):
+            year = paper["year"] or 0
+            if year_from is not None and year < year_from:
+                continue
+            if year_to is not None and year > year_to:
+                continue
+            if paper_type is not None and paper["type"] != paper_type:
+                continue
+            if q and q not in haystack:
+                continue
+            matches.append(paper)
+        end = None if limit is None else offset + limit
+        return matches[offset:end], len(matches)
@@ -0,0 +1,121 @@
+"""Opt-in request profiling.
+
+With ``PROFILE_ENABLED=1`` the middleware profiles requests that send an
+``X-Profile`` header (matching ``PROFILE_TOKEN`` when one is set) plus a
+random ``PROFILE_SAMPLE_RATE`` fraction of all requests. A profiled request
+runs under cProfile and tracemalloc; the result is written to
+``PROFILE_DIR`` as a pstats dump (``.prof``, for snakeviz/pstats) and a
+plain-text summary (``.txt``), keeping only the newest ``PROFILE_KEEP``
+pairs. The response carries the profile's name in ``X-Profile-Id``.
+
+When disabled the middleware isn't installed at all. Only one request is
+profiled at a time; cProfile follows the event loop thread, so work that
+other requests interleave on the loop is included, while work handed to the
+thread pool is not.
+"""
+import asyncio
+import cProfile
+import io
+import itertools
+import os
+import pstats
+import random
+import re
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+ENABLED = os.getenv("PROFILE_ENABLED", "0") == "1"
+SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+TOKEN = os.getenv("PROFILE_TOKEN", "")
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR") or Path(tempfile.gettempdir()) / "bionutrigraph-profiles")
+KEEP = int(os.getenv("PROFILE_KEEP", "20"))
+
+HEADER = b"x-profile"
+TOP_FUNCTIONS = 40
+TOP_ALLOCATIONS = 25
+TRACEBACK_FRAMES = 10
+
+
+def _slug(path: str) -> str:
+    return re.sub(r"[^A-Za-z0-9]+", "_", path).strip("_")[:60] or "root"
+
+
+class ProfilingMiddleware:
+    def __init__(self, app, directory: Path = PROFILE_DIR, sample_rate: float = SAMPLE_RATE, token: str = TOKEN, keep: int = KEEP):
+        self.app = app
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.token = token.encode()
+        self.keep = keep
+        self._busy = False
+        self._sequence = itertools.count()
+
+    def _selected(self, scope) -> bool:
+        for name, value in scope.get("headers", ()):
+            if name == HEADER:
+                return value == self.token if self.token else value not in (b"", b"0")
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self._busy or not self._selected(scope):
+            await self.app(scope, receive, send)
+            return
+
+        self._busy = True
+        name = f"{time.strftime('%Y%m%dT%H%M%S')}-{next(self._sequence):06d}-{scope.get('method', '')}-{_slug(scope.get('path', ''))}"
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message = {**message, "headers": [*message.get("headers", ()), (b"x-profile-id", name.encode())]}
+            await send(message)
+
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start(TRACEBACK_FRAMES)
+        tracemalloc.reset_peak()
+        before = tracemalloc.take_snapshot()
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        try:
+            profiler.enable()
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                profiler.disable()
+        finally:
+            elapsed = time.perf_counter() - start
+            after = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            if started_tracing:
+                tracemalloc.stop()
+            try:
+                await asyncio.to_thread(self._write, name, scope, status, elapsed, peak, profiler, before, after)
+            finally:
+                self._busy = False
+
+    def _write(self, name, scope, status, elapsed, peak, profiler, before, after) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        profiler.dump_stats(self.directory / f"{name}.prof")
+
+        out = io.StringIO()
+        query = scope.get("query_string", b"").decode("latin-1")
+        out.write(f"{scope.get('method')} {scope.get('path')}{'?' + query if query else ''} -> {status}\n")
+        out.write(f"wall time: {elapsed * 1000:.2f} ms\npeak traced memory: {peak / 1024:.1f} KiB\n\n")
+        stats = pstats.Stats(profiler, stream=out)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(TOP_FUNCTIONS)
+        out.write(f"Top {TOP_ALLOCATIONS} allocation sites (net change during the request):\n")
+        snapshot_filter = [tracemalloc.Filter(False, tracemalloc.__file__)]
+        differences = after.filter_traces(snapshot_filter).compare_to(before.filter_traces(snapshot_filter), "lineno")
+        for difference in differences[:TOP_ALLOCATIONS]:
+            out.write(f"  {difference}\n")
+        (self.directory / f"{name}.txt").write_text(out.getvalue(), encoding="utf-8")
+
+        profiles = sorted(self.directory.glob("*.prof"))
+        for old in profiles[:-self.keep] if self.keep > 0 else ():
+            old.unlink(missing_ok=True)
+            old.with_suffix(".txt").unlink(missing_ok=True)
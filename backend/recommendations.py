@@ -0,0 +1,158 @@
+"""Server-side port of the food recommendation model in Recommendations.tsx.
+
+Per snapshot the link table is turned into columns (food row, effect,
+strength score, citation count); incoming links per biomarker come from the
+CSR adjacency in GraphIndex, so the food x biomarker matrix is only ever
+touched at the selected biomarker columns. Scores are accumulated with
+np.bincount in link order, which adds the same doubles in the same order as
+the frontend loop and therefore yields an identical ranking.
+"""
+import numpy as np
+
+from graph_index import GraphIndex
+
+STRENGTH_SCORE = {"high": 3, "medium": 2, "low": 1}
+BENEFICIAL_WEIGHT = 2.6
+CONFLICT_WEIGHT = 1.7
+COVERAGE_BONUS = 1.6
+EVIDENCE_CAP = 8
+EVIDENCE_WEIGHT = 0.25
+CONFLICT_PENALTY = 0.8
+DEFAULT_DIRECTION = "decrease"
+
+
+def js_round(values):
+    # Math.round rounds halves up, Python's round() rounds them to even.
+    return np.floor(values + 0.5)
+
+
+class RecommendationEngine:
+    def __init__(self, index: GraphIndex):
+        self.index = index
+        links = index.links
+
+        self.effects: dict[str, int] = {}
+        food_row = np.full(len(index.nodes), -1, dtype=np.int64)
+        foods = [pos for pos, node in enumerate(index.nodes) if node.get("type") == "food"]
+        food_row[foods] = np.arange(len(foods))
+        self.food_positions = np.asarray(foods, dtype=np.int64)
+
+        sources = np.asarray(index.sources, dtype=np.int64)
+        self.link_food = np.where(sources >= 0, food_row[np.maximum(sources, 0)], -1)
+        self.link_effect = np.fromiter(
+            (self.effects.setdefault(effect, len(self.effects)) for effect in index.link_values("effect")),
+            dtype=np.int64,
+            count=len(links),
+        )
+        self.link_strength = np.fromiter(
+            (STRENGTH_SCORE.get(strength) or 1 for strength in index.link_values("strength")), dtype=np.float64, count=len(links)
+        )
+        self.link_citations = np.fromiter(
+            (len(citations or ()) for citations in index.link_citations()), dtype=np.float64, count=len(links)
+        )
+
+    def _gather(self, goals: list[tuple[str, str]]):
+        """Link ids and goal numbers for every food link into a selected biomarker."""
+        link_ids, goal_ids = [], []
+        for goal, (bio_id, _) in enumerate(goals):
+            pos = self.index.position.get(bio_id)
+            if pos is None:
+                continue
+            incoming = np.asarray(self.index.in_link_ids(pos), dtype=np.int64)
+            incoming = incoming[self.link_food[incoming] >= 0]
+            link_ids.append(incoming)
+            goal_ids.append(np.full(len(incoming), goal, dtype=np.int64))
+        if not link_ids:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        return np.concatenate(link_ids), np.concatenate(goal_ids)
+
+    def recommend(self, goals: list[tuple[str, str]], limit: int | None = None, limit_avoid: int = 6) -> dict:
+        # Each biomarker counts once, with the first direction given for it.
+        unique_goals = {}
+        for bio_id, direction in goals:
+            unique_goals.setdefault(bio_id, direction)
+        goals = list(unique_goals.items())
+        link_ids, goal_ids = self._gather(goals)
+        if len(link_ids) == 0:
+            return {
+                "recommendations": [],
+                "total": 0,
+                "foods_to_limit": [],
+                "summary": {"avg_coverage": 0, "top_evidence": 0},
+            }
+
+        desired = np.array([self.effects.get(direction, -1) for _, direction in goals], dtype=np.int64)
+        beneficial = self.link_effect[link_ids] == desired[goal_ids]
+        strength = self.link_strength[link_ids]
+        contribution = np.where(beneficial, strength * BENEFICIAL_WEIGHT, -strength * CONFLICT_WEIGHT)
+
+        # Rows are numbered in first-seen order, which is the order the
+        # frontend inserts foods into its score map (and so its tie order).
+        foods, first_seen, inverse = np.unique(self.link_food[link_ids], return_index=True, return_inverse=True)
+        seen_order = np.argsort(first_seen, kind="stable")
+        rank_of = np.empty(len(foods), dtype=np.int64)
+        rank_of[seen_order] = np.arange(len(foods))
+        rows = rank_of[inverse]
+        food_rows = foods[seen_order]
+        n = len(food_rows)
+
+        score = np.bincount(rows, weights=contribution, minlength=n)
+        matched = np.bincount(rows, minlength=n)
+        beneficial_count = np.bincount(rows, weights=beneficial, minlength=n)
+        conflict_count = matched - beneficial_count
+        evidence = np.bincount(rows, weights=self.link_citations[link_ids], minlength=n)
+        covered_pairs = np.unique(rows * len(goals) + goal_ids)
+        coverage = np.bincount(covered_pairs // len(goals), minlength=n).astype(np.float64)
+        coverage_pct = js_round(coverage / len(goals) * 100)
+
+        final = (
+            score
+            + coverage * COVERAGE_BONUS
+            + np.minimum(evidence, EVIDENCE_CAP) * EVIDENCE_WEIGHT
+            - conflict_count * CONFLICT_PENALTY
+        )
+        ranking = np.argsort(-final, kind="stable")
+        positive = ranking[final[ranking] > 0]
+        avoid = ranking[(final[ranking] <= 0) & (conflict_count[ranking] > 0)][:limit_avoid]
+
+        link_order = np.argsort(rows, kind="stable")
+        match_offsets = np.concatenate(([0], np.cumsum(matched)))
+
+        def item(row: int) -> dict:
+            members = link_order[match_offsets[row]:match_offsets[row + 1]]
+            covered = sorted(set(goal_ids[members].tolist()))
+            return {
+                "food": self.index.nodes[self.food_positions[food_rows[row]]],
+                "final_score": float(final[row]),
+                "score": float(score[row]),
+                "coverage_count": int(coverage[row]),
+                "coverage_pct": int(coverage_pct[row]),
+                "beneficial_count": int(beneficial_count[row]),
+                "conflict_count": int(conflict_count[row]),
+                "evidence_count": int(evidence[row]),
+                "covered_biomarkers": [goals[g][0] for g in covered],
+                "matches": [self._match(int(link_ids[m]), goals[goal_ids[m]][0], bool(beneficial[m])) for m in members],
+            }
+
+        return {
+            "recommendations": [item(row) for row in positive[:limit]],
+            "total": int(len(positive)),
+            "foods_to_limit": [item(row) for row in avoid],
+            "summary": {
+                "avg_coverage": int(js_round(coverage_pct[positive].mean())) if len(positive) else 0,
+                "top_evidence": int(evidence[positive].max()) if len(positive) else 0,
+            },
+        }
+
+    def _match(self, link_idx: int, bio_id: str, beneficial: bool) -> dict:
+        link = self.index.links[link_idx]
+        bio = self.index.node(bio_id)
+        return {
+            "biomarker": (bio or {}).get("label") or bio_id,
+            "effect": link.get("effect"),
+            "strength": link.get("strength"),
+            "magnitude": link.get("magnitude"),
+            "timeframe": link.get("timeframe"),
+            "summary": link.get("summary"),
+            "beneficial": beneficial,
+        }
@@ -0,0 +1,86 @@
+"""Label search index built once per dataset snapshot.
+
+Labels are normalized up front. Prefix matches come from a sorted array of
+normalized labels (a flattened trie: every prefix is a contiguous range found
+with two binary searches), infix matches from trigram postings that are
+intersected and then verified. Results are ranked exact > prefix > infix,
+then by label length and dataset order.
+"""
+from bisect import bisect_left
+from collections import defaultdict
+
+EXACT, PREFIX, INFIX = 0, 1, 2
+
+
+def normalize(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def trigrams(text: str) -> set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class SearchIndex:
+    def __init__(self, nodes: list):
+        self.nodes = nodes
+        self.labels = [normalize(node.get("label", "")) for node in nodes]
+
+        order = sorted(range(len(nodes)), key=lambda pos: self.labels[pos])
+        self.sorted_labels = [self.labels[pos] for pos in order]
+        self.sorted_positions = order
+
+        postings = defaultdict(list)
+        for pos, label in enumerate(self.labels):
+            for gram in trigrams(label):
+                postings[gram].append(pos)
+        self.postings = dict(postings)
+
+    def _prefix_range(self, prefix: str) -> range:
+        lo = bisect_left(self.sorted_labels, prefix)
+        # "\uffff" sorts after any character that can follow the prefix.
+        hi = bisect_left(self.sorted_labels, prefix + "\uffff", lo)
+        return range(lo, hi)
+
+    def _infix_candidates(self, q: str):
+        if len(q) < 3:
+            return range(len(self.labels))
+        grams = sorted(trigrams(q), key=lambda g: len(self.postings.get(g, ())))
+        if not grams or grams[0] not in self.postings:
+            return ()
+        candidates = set(self.postings[grams[0]])
+        for gram in grams[1:]:
+            candidates.intersection_update(self.postings.get(gram, ()))
+            if not candidates:
+                break
+        return candidates
+
+    def _accept(self, pos: int, node_type: str | None, group: str | None) -> bool:
+        node = self.nodes[pos]
+        if node_type is not None and node.get("type") != node_type:
+            return False
+        if group is not None and node.get("group") != group:
+            return False
+        return True
+
+    def search(
+        self,
+        q: str,
+        limit: int | None = None,
+        offset: int = 0,
+        node_type: str | None = None,
+        group: str | None = None,
+    ) -> tuple[list[dict], int]:
+        """Return one page of matching nodes and the total number of matches."""
+        q = normalize(q)
+        ranked = {}
+        for i in self._prefix_range(q):
+            pos = self.sorted_positions[i]
+            ranked[pos] = EXACT if self.labels[pos] == q else PREFIX
+        for pos in self._infix_candidates(q):
+            if pos not in ranked and q in self.labels[pos]:
+                ranked[pos] = INFIX
+
+        matches = [pos for pos in ranked if self._accept(pos, node_type, group)]
+        matches.sort(key=lambda pos: (ranked[pos], len(self.labels[pos]), pos))
+        end = None if limit is None else offset + limit
+        return [self.nodes[pos] for pos in matches[offset:end]], len(matches)
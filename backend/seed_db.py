@@ -1,77 +1,240 @@
-import json
+#!/usr/bin/env python3
+"""Load a dataset into Neo4j.
+
+    python seed_db.py ../frontend/src/data/mvp_dataset.json --batch-size 5000 --workers 4
+    python seed_db.py ../frontend/src/data/mvp_dataset.json --mode full
+
+``--mode sync`` (the default) reads the id/key, content hash and position
+of every node and link already in the graph and only creates, updates or
+deletes what differs from the dataset; rows that only moved get just their
+position rewritten. New and changed rows are written before
+stale ones are deleted, so readers never see an empty graph. ``--mode
+full`` wipes the graph and creates everything.
+
+Writes go in ``UNWIND $rows`` batches, each batch one explicit write
+transaction (retried on transient errors such as deadlocks). Links are
+grouped by the labels of their ends so every lookup goes through a
+uniqueness-constraint index, and ``--workers`` batches run in parallel.
+Prints rows per second for each phase.
+"""
+import argparse
+import os
 import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 from neo4j import GraphDatabase
+from graph_store import read_source
+from neo4j_store import LABELS, SCHEMA, link_keys, link_properties, node_properties, relationship_type
 
-# Clean data path - adjust relative to where you run this script
+# Clean data path - adjust relative to where you run this script (JSON, compiled .bng or SQLite)
 DATA_PATH = "../frontend/src/data/mvp_dataset.json"
-URI = "bolt://localhost:7687"
-AUTH = ("neo4j", "password")
-
-def seed_data():
-    driver = GraphDatabase.driver(URI, auth=AUTH)
-    
-    with open(DATA_PATH) as f:
-        data = json.load(f)
-
-    with driver.session() as session:
-        # Constraints
-        session.run("CREATE CONSTRAINT IF NOT EXISTS FOR (f:Food) REQUIRE f.id IS UNIQUE")
-        session.run("CREATE CONSTRAINT IF NOT EXISTS FOR (b:Biomarker) REQUIRE b.id IS UNIQUE")
-        
-        # Clear existing
-        session.run("MATCH (n) DETACH DELETE n")
-        
-        # Nodes
-        for node in data["nodes"]:
-            if node["type"] == "food":
-                session.run(
-                    """
-                    MERGE (f:Food {id: $id})
-                    SET f.name = $label, f.group = $group, f.image = $image
-                    """, 
-                    id=node["id"], label=node["label"], group=node["group"], image=node.get("image", "")
-                )
-            elif node["type"] == "biomarker":
-                session.run(
-                    """
-                    MERGE (b:Biomarker {id: $id})
-                    SET b.name = $label, b.group = $group, b.description = $desc, b.target = $target
-                    """,
-                    id=node["id"], label=node["label"], group=node["group"], 
-                    desc=node.get("description", ""), target=node.get("target", "")
-                )
-        
-        # Relationships
-        for link in data["links"]:
-            session.run(
-                """
-                MATCH (s {id: $source_id}), (t {id: $target_id})
-                MERGE (s)-[r:IMPROVES]->(t)
-                SET r.effect = $effect,
-                    r.strength = $strength,
-                    r.magnitude = $magnitude,
-                    r.timeframe = $timeframe,
-                    r.confidence_score = $confidence,
-                    r.summary = $summary
-                """,
-                source_id=link["source"],
-                target_id=link["target"],
-                effect=link["effect"],
-                strength=link["strength"],
-                magnitude=link["magnitude"],
-                timeframe=link["timeframe"],
-                confidence=link["confidence_score"],
-                summary=link.get("summary", "")
-            )
-            
-    driver.close()
+URI = os.getenv("NEO4J_URI", "bolt://localhost:7687")
+AUTH = (os.getenv("NEO4J_USER", "neo4j"), os.getenv("NEO4J_PASSWORD", "password"))
+DATABASE = os.getenv("NEO4J_DATABASE") or None
+
+CLEAR = "MATCH (n) CALL { WITH n DETACH DELETE n } IN TRANSACTIONS OF 10000 ROWS"
+CREATE_NODES = "UNWIND $rows AS props CREATE (n:{label}) SET n = props"
+UPDATE_NODES = "UNWIND $rows AS props MATCH (n:{label} {{id: props.id}}) SET n = props"
+DELETE_NODES = "UNWIND $rows AS id MATCH (n:{label} {{id: id}}) DETACH DELETE n"
+CREATE_LINKS = """
+    UNWIND $rows AS row
+    MATCH (s:{source} {{id: row.source}})
+    MATCH (t:{target} {{id: row.target}})
+    CREATE (s)-[r:{type}]->(t)
+    SET r = row.props
+"""
+MOVE_NODES = "UNWIND $rows AS row MATCH (n:{label} {{id: row.id}}) SET n.pos = row.pos"
+UPDATE_LINKS = "UNWIND $rows AS row MATCH ()-[r]->() WHERE elementId(r) = row.element SET r = row.props"
+MOVE_LINKS = "UNWIND $rows AS row MATCH ()-[r]->() WHERE elementId(r) = row.element SET r.idx = row.idx"
+DELETE_LINKS = "UNWIND $rows AS element MATCH ()-[r]->() WHERE elementId(r) = element DELETE r"
+READ_NODES = "MATCH (n:{label}) RETURN n.id AS id, n.hash AS hash, n.pos AS pos"
+# Every relationship between dataset nodes, whatever its type, so edges of
+# types seeding no longer writes are deleted too.
+READ_LINKS = """
+    MATCH (s:Food|Biomarker)-[r]->(t:Food|Biomarker)
+    RETURN elementId(r) AS element, type(r) AS type, r.key AS key, r.hash AS hash, r.idx AS idx,
+           [label IN labels(s) WHERE label IN ['Food', 'Biomarker']][0] AS source,
+           [label IN labels(t) WHERE label IN ['Food', 'Biomarker']][0] AS target
+"""
+SET_VERSION = "MERGE (d:Dataset {key: 'current'}) SET d.version = $version"
+
+
+def node_rows(nodes: list[dict]) -> dict[str, list[dict]]:
+    """Node properties grouped by label; the first record wins for a repeated id, as in the API."""
+    rows: dict[str, list[dict]] = {}
+    seen = set()
+    for pos, node in enumerate(nodes):
+        label = LABELS.get(node.get("type"))
+        node_id = node.get("id")
+        if label is None or not isinstance(node_id, str) or node_id in seen:
+            continue
+        seen.add(node_id)
+        rows.setdefault(label, []).append(node_properties(node, pos))
+    return rows
+
+
+def link_rows(links: list[dict], labels: dict[str, str]) -> dict[tuple[str, str, str], list[dict]]:
+    """Links between known nodes, grouped by (source label, relationship type, target label)."""
+    rows: dict[tuple[str, str, str], list[dict]] = {}
+    for idx, (link, key) in enumerate(zip(links, link_keys(links))):
+        source, target = labels.get(link.get("source")), labels.get(link.get("target"))
+        if source is None or target is None:
+            continue
+        rows.setdefault((source, relationship_type(link), target), []).append(
+            {"source": link["source"], "target": link["target"], "props": link_properties(link, idx, key)}
+        )
+    return rows
+
+
+def batches(rows: list, size: int):
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+def write_batches(driver, jobs: list[tuple[str, list]], workers: int) -> int:
+    """Run (query, rows) jobs, each in its own write transaction, ``workers`` at a time."""
+
+    def write(job) -> int:
+        query, rows = job
+        with driver.session(database=DATABASE) as session:
+            session.execute_write(lambda tx: tx.run(query, rows=rows).consume())
+        return len(rows)
+
+    if workers <= 1:
+        return sum(map(write, jobs))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="seed") as pool:
+        return sum(pool.map(write, jobs))
+
+
+def report(phase: str, rows: int, seconds: float) -> None:
+    print(f"{phase}: {rows} rows in {seconds:.2f}s ({rows / max(seconds, 1e-9):,.0f} rows/s)")
+
+
+def run_phase(driver, phase: str, groups: dict[str, list], batch_size: int, workers: int) -> None:
+    """Write ``{query: rows}`` in batches and report the rate."""
+    jobs = [(query, batch) for query, rows in groups.items() for batch in batches(rows, batch_size)]
+    if not jobs:
+        return
+    start = time.perf_counter()
+    count = write_batches(driver, jobs, workers)
+    report(phase, count, time.perf_counter() - start)
+
+
+def read_rows(driver, query: str) -> list[dict]:
+    records, _, _ = driver.execute_query(query, database_=DATABASE)
+    return [record.data() for record in records]
+
+
+def diff(driver, nodes: dict[str, list[dict]], links: dict[tuple, list[dict]]) -> dict[str, dict[str, list]]:
+    """What to write, per phase, to turn the graph into the dataset: ``{phase: {query: rows}}``."""
+    plan: dict[str, dict[str, list]] = {
+        phase: {}
+        for phase in ("Created nodes", "Updated nodes", "Moved nodes", "Created links", "Updated links", "Moved links", "Deleted links", "Deleted nodes")
+    }
+
+    for label in LABELS.values():
+        stored = {row["id"]: row for row in read_rows(driver, READ_NODES.format(label=label))}
+        new, changed, moved = [], [], []
+        for props in nodes.get(label, []):
+            row = stored.pop(props["id"], None)
+            if row is None:
+                new.append(props)
+            elif row["hash"] != props["hash"]:
+                changed.append(props)
+            elif row["pos"] != props["pos"]:
+                moved.append({"id": props["id"], "pos": props["pos"]})
+        plan["Created nodes"][CREATE_NODES.format(label=label)] = new
+        plan["Updated nodes"][UPDATE_NODES.format(label=label)] = changed
+        plan["Moved nodes"][MOVE_NODES.format(label=label)] = moved
+        plan["Deleted nodes"][DELETE_NODES.format(label=label)] = list(stored)
+
+    # A link is kept when its key (its content), its relationship type and
+    # the labels of its ends are unchanged.
+    wanted = {
+        (row["props"]["key"], source, type_, target): (row, create)
+        for (source, type_, target), rows in links.items()
+        for create in [CREATE_LINKS.format(source=source, type=type_, target=target)]
+        for row in rows
+    }
+    updated, moved, stale = [], [], []
+    for row in read_rows(driver, READ_LINKS):
+        match = wanted.pop((row["key"], row["source"], row["type"], row["target"]), None)
+        if match is None:
+            stale.append(row["element"])
+        elif match[0]["props"]["hash"] != row["hash"]:
+            updated.append({"element": row["element"], "props": match[0]["props"]})
+        elif match[0]["props"]["idx"] != row["idx"]:
+            moved.append({"element": row["element"], "idx": match[0]["props"]["idx"]})
+    for row, create in wanted.values():
+        plan["Created links"].setdefault(create, []).append(row)
+    plan["Updated links"][UPDATE_LINKS] = updated
+    plan["Moved links"][MOVE_LINKS] = moved
+    plan["Deleted links"][DELETE_LINKS] = stale
+    return plan
+
+
+def wait_for(driver, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            driver.verify_connectivity()
+            return
+        except Exception:
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(1)
+
+
+def seed_data(path=DATA_PATH, mode: str = "sync", batch_size: int = 5000, workers: int = 4, wait: float = 10):
+    version, load = read_source(Path(path))
+    data = load(None).data
+    nodes = node_rows(data["nodes"])
+    labels = {props["id"]: label for label, rows in nodes.items() for props in rows}
+    links = link_rows(data["links"], labels)
+
+    with GraphDatabase.driver(URI, auth=AUTH) as driver:
+        wait_for(driver, wait)
+        with driver.session(database=DATABASE) as session:
+            # Constraints and search indexes
+            for statement in SCHEMA:
+                session.run(statement).consume()
+
+        if mode == "full":
+            start = time.perf_counter()
+            with driver.session(database=DATABASE) as session:
+                session.run(CLEAR).consume()
+            print(f"Cleared the graph in {time.perf_counter() - start:.2f}s")
+            plan = {
+                "Created nodes": {CREATE_NODES.format(label=label): rows for label, rows in nodes.items()},
+                "Created links": {
+                    CREATE_LINKS.format(source=source, type=type_, target=target): rows
+                    for (source, type_, target), rows in links.items()
+                },
+            }
+        else:
+            start = time.perf_counter()
+            plan = diff(driver, nodes, links)
+            changes = sum(len(rows) for groups in plan.values() for rows in groups.values())
+            print(f"Compared with the graph in {time.perf_counter() - start:.2f}s: {changes} changes")
+
+        for phase, groups in plan.items():
+            run_phase(driver, phase, groups, batch_size, workers)
+
+        # Written last: the API drops its cached results when this changes.
+        driver.execute_query(SET_VERSION, version=version, database_=DATABASE)
     print("Database seeded successfully!")
 
+
+def main():
+    parser = argparse.ArgumentParser(description="Load a dataset into Neo4j")
+    parser.add_argument("path", nargs="?", default=DATA_PATH, help="Dataset file (JSON, compiled .bng or SQLite)")
+    parser.add_argument("--mode", choices=("sync", "full"), default="sync", help="Apply only the differences, or wipe and reload")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Rows per transaction")
+    parser.add_argument("--workers", type=int, default=4, help="Transactions run in parallel")
+    parser.add_argument("--wait", type=float, default=10, help="Seconds to wait for Neo4j to accept connections")
+    args = parser.parse_args()
+    seed_data(args.path, args.mode, args.batch_size, args.workers, args.wait)
+
+
 if __name__ == "__main__":
-    # Wait for Neo4j to be ready
-    print("Waiting for Neo4j...")
-    time.sleep(10) 
-    try:
-        seed_data()
-    except Exception as e:
-        print(f"Error: {e}")
+    main()
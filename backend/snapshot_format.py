@@ -0,0 +1,346 @@
+"""Compiled, memory-mappable dataset snapshots.
+
+A compiled snapshot is a columnar little-endian file:
+
+* a header with a magic number, the format version, the sha256 of the JSON
+  it was compiled from (the snapshot version) and a section table;
+* an interned string table (one copy of every distinct string);
+* fixed-width columns per node, link and citation field: uint32 string ids,
+  int32 node positions for link endpoints, int32 citation years;
+* the CSR adjacency used by GraphIndex, precomputed;
+* the ``/graph`` response body, already encoded;
+* the dataset's other top-level members, as JSON.
+
+Records keep their exact JSON shape: each one stores the id of its key-order
+"shape" string, and anything that doesn't fit a typed column (unknown keys,
+unexpected value types) goes into a small per-record JSON "extra" string.
+
+Opening a snapshot maps the file and slices memoryviews over it; nothing is
+decoded until a record is actually read. Derived structures that only need
+a few fields per record read those columns instead of decoding records. Files are always written to a
+temporary name and renamed into place, so a live mapping never sees a
+truncated file.
+"""
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from functools import lru_cache, partial
+from pathlib import Path
+
+from encoded_payload import dumps_incremental
+from graph_index import GraphIndex
+from graph_model import Records, top_level, with_records
+import sqlite_store
+
+MAGIC = b"BNGRAPH\x00"
+FORMAT_VERSION = 3
+NONE = 0xFFFFFFFF
+NO_YEAR = -(2**31)
+
+HEADER = struct.Struct("<8sII64s")
+SECTION = struct.Struct("<24sQQ")
+
+NODE_FIELDS = ("id", "label", "type", "group", "description")
+LINK_FIELDS = ("effect", "strength", "magnitude", "timeframe", "summary")
+CITATION_FIELDS = ("title", "doi", "type")
+SHAPE_SEPARATOR = "\x1f"
+
+# Column name -> array typecode.
+COLUMNS = {
+    **{f"node.{name}": "I" for name in NODE_FIELDS + ("shape", "extra")},
+    "link.source": "i",
+    "link.target": "i",
+    "link.source_id": "I",
+    "link.target_id": "I",
+    **{f"link.{name}": "I" for name in LINK_FIELDS + ("shape", "extra")},
+    "link.citations": "I",
+    **{f"cite.{name}": "I" for name in CITATION_FIELDS + ("shape", "extra")},
+    "cite.year": "i",
+    "out.offsets": "q",
+    "out.links": "q",
+    "in.offsets": "q",
+    "in.links": "q",
+    "strings.offsets": "Q",
+}
+# Fields whose string ids live in a column of another name.
+STRING_COLUMNS = {"link.source": "link.source_id", "link.target": "link.target_id"}
+
+if sys.byteorder != "little":  # pragma: no cover - columns are mapped as-is
+    raise ImportError("compiled snapshots require a little-endian platform")
+
+
+def is_compiled(path: Path) -> bool:
+    try:
+        with path.open("rb") as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+class _Strings:
+    def __init__(self):
+        self.ids: dict[str, int] = {}
+        self.values: list[str] = []
+
+    def intern(self, value: str | None) -> int:
+        if value is None:
+            return NONE
+        string_id = self.ids.get(value)
+        if string_id is None:
+            string_id = self.ids[value] = len(self.values)
+            self.values.append(value)
+        return string_id
+
+
+def _encode_record(record: dict, fields: tuple, columns: dict, strings: _Strings, typed=None) -> None:
+    """Append one record's string ids, shape and extras to its columns."""
+    extra = {}
+    for name in fields:
+        value = record.get(name)
+        if name in record and not isinstance(value, str):
+            extra[name] = value
+            value = None
+        columns[name].append(strings.intern(value))
+    for name, value in record.items():
+        if name not in fields and name not in (typed or ()):
+            extra[name] = value
+    columns["shape"].append(strings.intern(SHAPE_SEPARATOR.join(record)))
+    columns["extra"].append(strings.intern(json.dumps(extra, ensure_ascii=False)) if extra else NONE)
+
+
+def compile_data(data: dict, version: str) -> bytes:
+    """Encode a parsed dataset; ``version`` is the sha256 of its JSON source."""
+    strings = _Strings()
+    nodes = data.get("nodes", [])
+    links = data.get("links", [])
+    columns = {name: array(code) for name, code in COLUMNS.items()}
+
+    def group(prefix: str, fields: tuple) -> dict:
+        return {name: columns[f"{prefix}.{name}"] for name in fields + ("shape", "extra")}
+
+    node_columns = group("node", NODE_FIELDS)
+    for node in nodes:
+        _encode_record(node, NODE_FIELDS, node_columns, strings)
+
+    index = GraphIndex(nodes, links)
+    link_columns = group("link", LINK_FIELDS)
+    cite_columns = group("cite", CITATION_FIELDS)
+    columns["link.citations"].append(0)
+    for link_idx, link in enumerate(links):
+        typed = ["source", "target"]
+        citations = link.get("citations")
+        if isinstance(citations, list) and all(isinstance(c, dict) for c in citations):
+            typed.append("citations")
+            for citation in citations:
+                year = citation.get("year")
+                typed_year = isinstance(year, int) and not isinstance(year, bool) and NO_YEAR < year < 2**31
+                columns["cite.year"].append(year if typed_year else NO_YEAR)
+                _encode_record(citation, CITATION_FIELDS, cite_columns, strings, typed=("year",) if typed_year else ())
+        columns["link.citations"].append(len(columns["cite.year"]))
+        for end in ("source", "target"):
+            value = link.get(end)
+            if end in link and not isinstance(value, str):
+                typed.remove(end)
+                value = None
+            columns[f"link.{end}_id"].append(strings.intern(value))
+            columns[f"link.{end}"].append((index.sources if end == "source" else index.targets)[link_idx])
+        _encode_record(link, LINK_FIELDS, link_columns, strings, typed=typed)
+
+    for name in ("out_offsets", "out_links", "in_offsets", "in_links"):
+        columns[name.replace("_", ".")].fromlist(getattr(index, name).tolist())
+
+    encoded = [value.encode("utf-8") for value in strings.values]
+    offset = 0
+    columns["strings.offsets"].append(0)
+    for value in encoded:
+        offset += len(value)
+        columns["strings.offsets"].append(offset)
+
+    sections = [(name, column.tobytes()) for name, column in columns.items()]
+    sections.append(("strings.data", b"".join(encoded)))
+    sections.append(("graph.json", dumps_incremental(data)))
+    sections.append(("top_level.json", json.dumps(top_level(data), ensure_ascii=False).encode("utf-8")))
+    counts = struct.pack("<QQQ", len(nodes), len(links), len(columns["cite.year"]))
+    sections.append(("counts", counts))
+
+    header_size = HEADER.size + 4 + SECTION.size * len(sections)
+    out = bytearray(header_size)
+    table = []
+    for name, payload in sections:
+        out += b"\x00" * (-len(out) % 8)
+        table.append((name, len(out), len(payload)))
+        out += payload
+    HEADER.pack_into(out, 0, MAGIC, FORMAT_VERSION, 0, version.encode("ascii"))
+    struct.pack_into("<I", out, HEADER.size, len(sections))
+    for i, (name, offset, length) in enumerate(table):
+        SECTION.pack_into(out, HEADER.size + 4 + i * SECTION.size, name.encode("ascii"), offset, length)
+    return bytes(out)
+
+
+def compile_file(source: Path, target: Path) -> str:
+    """Compile a JSON dataset, or a SQLite database written by sqlite_store, to ``target``."""
+    if sqlite_store.is_sqlite(source):
+        data, version = sqlite_store.read_data(source), sqlite_store.read_version(source)
+    else:
+        raw = source.read_bytes()
+        data, version = json.loads(raw), hashlib.sha256(raw).hexdigest()
+    payload = compile_data(data, version)
+    tmp = target.with_name(target.name + ".tmp")
+    tmp.write_bytes(payload)
+    os.replace(tmp, target)
+    return version
+
+
+def read_version(path: Path) -> str:
+    with path.open("rb") as f:
+        magic, fmt, _, version = HEADER.unpack(f.read(HEADER.size))
+    if magic != MAGIC or fmt != FORMAT_VERSION:
+        raise ValueError(f"{path} is not a compiled snapshot (format {FORMAT_VERSION})")
+    return version.decode("ascii")
+
+
+def _string(offsets, data, string_id: int) -> str | None:
+    if string_id == NONE:
+        return None
+    return str(data[offsets[string_id]:offsets[string_id + 1]], "utf-8")
+
+
+class CompiledGraph:
+    """A memory-mapped compiled snapshot, or one held in memory as the bytes
+    compile_data() returned."""
+
+    def __init__(self, source: Path | bytes):
+        if isinstance(source, bytes):
+            buf = memoryview(source)
+        else:
+            with source.open("rb") as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            buf = memoryview(self._mmap)
+        magic, fmt, _, version = HEADER.unpack_from(buf, 0)
+        if magic != MAGIC or fmt != FORMAT_VERSION:
+            name = "data" if isinstance(source, bytes) else source
+            raise ValueError(f"{name} is not a compiled snapshot (format {FORMAT_VERSION})")
+        self.version = version.decode("ascii")
+
+        (count,) = struct.unpack_from("<I", buf, HEADER.size)
+        self.columns = {}
+        for i in range(count):
+            name, offset, length = SECTION.unpack_from(buf, HEADER.size + 4 + i * SECTION.size)
+            name = name.rstrip(b"\x00").decode("ascii")
+            section = buf[offset:offset + length]
+            self.columns[name] = section.cast(COLUMNS[name]) if name in COLUMNS else section
+        self.node_count, self.link_count, self.citation_count = struct.unpack("<QQQ", self.columns["counts"])
+        self.top_level = json.loads(bytes(self.columns["top_level.json"]))
+        # Bound to the columns rather than to self, so the graph holds no
+        # reference cycle and is unmapped as soon as it is released.
+        self.string = lru_cache(maxsize=1 << 16)(
+            partial(_string, self.columns["strings.offsets"], self.columns["strings.data"])
+        )
+
+    @property
+    def graph_json(self) -> bytes:
+        """The whole graph as the JSON body /graph serves."""
+        return bytes(self.columns["graph.json"])
+
+    @property
+    def nodes(self) -> Records:
+        return Records(self.node_count, self.node)
+
+    @property
+    def links(self) -> Records:
+        return Records(self.link_count, self.link)
+
+    def _record(self, prefix: str, fields: tuple, pos: int, typed: dict) -> dict:
+        extra_id = self.columns[f"{prefix}.extra"][pos]
+        extra = json.loads(self.string(extra_id)) if extra_id != NONE else {}
+        shape = self.string(self.columns[f"{prefix}.shape"][pos])
+        record = {}
+        for name in shape.split(SHAPE_SEPARATOR) if shape else ():
+            if name in extra:
+                record[name] = extra[name]
+            elif name in typed:
+                record[name] = typed[name]()
+            else:
+                record[name] = self.string(self.columns[f"{prefix}.{name}"][pos])
+        return record
+
+    def node(self, pos: int) -> dict:
+        return self._record("node", NODE_FIELDS, pos, {})
+
+    def citation(self, pos: int) -> dict:
+        return self._record("cite", CITATION_FIELDS, pos, {"year": lambda: self.columns["cite.year"][pos]})
+
+    def link(self, idx: int) -> dict:
+        start, end = self.columns["link.citations"][idx], self.columns["link.citations"][idx + 1]
+        return self._record(
+            "link",
+            LINK_FIELDS,
+            idx,
+            {
+                "source": lambda: self.string(self.columns["link.source_id"][idx]),
+                "target": lambda: self.string(self.columns["link.target_id"][idx]),
+                "citations": lambda: [self.citation(i) for i in range(start, end)],
+            },
+        )
+
+    def _extras(self, prefix: str) -> dict[int, dict]:
+        return {pos: json.loads(self.string(i)) for pos, i in enumerate(self.columns[f"{prefix}.extra"]) if i != NONE}
+
+    def values(self, prefix: str, name: str, default=None) -> list:
+        """``record.get(name, default)`` for every record of one kind, read from its column."""
+        key = f"{prefix}.{name}"
+        column = self.columns[STRING_COLUMNS.get(key, key)]
+        if key == "cite.year":
+            values = [default if year == NO_YEAR else year for year in column]
+        else:
+            # A missing string is either an absent key or a value kept in extra.
+            strings = {string_id: self.string(string_id) for string_id in set(column)}
+            strings[NONE] = default
+            values = [strings[string_id] for string_id in column]
+        for pos, extra in self._extras(prefix).items():
+            if name in extra:
+                values[pos] = extra[name]
+        return values
+
+    def link_values(self, name: str, default=None) -> list:
+        return self.values("link", name, default)
+
+    def link_citations(self, *fields: str) -> list:
+        """Same as GraphModel.link_citations, from the citation columns."""
+        offsets = self.columns["link.citations"]
+        columns = [self.values("cite", field) for field in fields]
+        rows = list(zip(*columns)) if columns else [()] * self.citation_count
+        shapes = self.columns["link.shape"]
+        cited = {shape: "citations" in self.string(shape).split(SHAPE_SEPARATOR) for shape in set(shapes)}
+        extras = self._extras("link")
+        result = []
+        for idx in range(self.link_count):
+            extra = extras.get(idx)
+            if extra is not None and "citations" in extra:
+                result.append(extra["citations"])
+            elif cited[shapes[idx]]:
+                result.append(tuple(rows[offsets[idx]:offsets[idx + 1]]))
+            else:
+                result.append(None)
+        return result
+
+    def node_ids(self) -> list[str]:
+        return [self.string(i) for i in self.columns["node.id"]]
+
+    def to_data(self) -> dict:
+        return with_records(self.top_level, list(self.nodes), list(self.links))
+
+
+def read_dataset(path: Path | str) -> dict:
+    """Load a dataset from its JSON, compiled or SQLite form."""
+    path = Path(path)
+    if is_compiled(path):
+        return CompiledGraph(path).to_data()
+    if sqlite_store.is_sqlite(path):
+        return sqlite_store.read_data(path)
+    with path.open("r", encoding="utf-8") as f:
+        return json.load(f)
@@ -0,0 +1,298 @@
+"""Embedded SQLite copy of the dataset.
+
+Every node and link is a row holding its exact JSON record plus the columns
+queries filter on, in dataset order (``pos``/``idx``), so loading the rows
+back (with the other top-level members kept in ``meta``) reproduces the
+JSON file. ``links(source)``, ``links(target)`` and
+``nodes(type, group)`` are indexed, and ``label_fts`` is an FTS5 trigram
+index over the normalized labels, so search has the same label-substring
+semantics (and ranking) as search_index.py without scanning every node.
+``text_fts`` is an FTS5 word index with one row per node over its label,
+its description and the summaries of the links touching it, for full-text
+search (``/search?mode=text``).
+
+Databases are written to a temporary file and renamed into place, and the
+API opens them read-only.
+"""
+import json
+import os
+import re
+import sqlite3
+import threading
+from pathlib import Path
+
+from graph_model import top_level, with_records
+from search_index import normalize
+
+MAGIC = b"SQLite format 3\x00"
+# Bumped whenever the tables change; the API refuses databases of another schema.
+SCHEMA_VERSION = "4"
+
+SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE nodes (
+    pos INTEGER PRIMARY KEY,
+    id TEXT,
+    label TEXT,
+    search_label TEXT NOT NULL,
+    type TEXT,
+    "group" TEXT,
+    record TEXT NOT NULL
+);
+CREATE TABLE links (
+    idx INTEGER PRIMARY KEY,
+    source TEXT,
+    target TEXT,
+    record TEXT NOT NULL
+);
+CREATE VIRTUAL TABLE label_fts USING fts5(
+    search_label,
+    content = 'nodes',
+    content_rowid = 'pos',
+    tokenize = 'trigram'
+);
+CREATE VIRTUAL TABLE text_fts USING fts5(label, description, summaries);
+"""
+
+INDEXES = """
+CREATE INDEX nodes_id ON nodes (id);
+CREATE INDEX nodes_type_group ON nodes (type, "group");
+CREATE INDEX links_source ON links (source);
+CREATE INDEX links_target ON links (target);
+"""
+
+# Trigram queries need at least this many characters; shorter ones scan.
+MIN_TRIGRAM_QUERY = 3
+
+# bm25 column weights for text_fts: label, description, summaries.
+TEXT_RANK = "bm25(text_fts, 10.0, 2.0, 1.0)"
+
+
+def is_sqlite(path: Path) -> bool:
+    try:
+        with path.open("rb") as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+def _text(value):
+    return value if isinstance(value, str) else None
+
+
+def search_label(node: dict) -> str:
+    label = node.get("label")
+    return normalize(label) if isinstance(label, str) else ""
+
+
+def write_database(data: dict, version: str, target: Path) -> None:
+    """Write ``data`` (whose JSON source has sha256 ``version``) to ``target``."""
+    tmp = target.with_name(target.name + ".tmp")
+    tmp.unlink(missing_ok=True)
+    con = sqlite3.connect(tmp)
+    try:
+        con.executescript(SCHEMA)
+        nodes = data.get("nodes", [])
+        links = data.get("links", [])
+        con.executemany(
+            'INSERT INTO nodes (pos, id, label, search_label, type, "group", record) VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (
+                (pos, _text(node.get("id")), _text(node.get("label")), search_label(node), _text(node.get("type")), _text(node.get("group")), json.dumps(node, ensure_ascii=False))
+                for pos, node in enumerate(nodes)
+            ),
+        )
+        con.executemany(
+            "INSERT INTO links (idx, source, target, record) VALUES (?, ?, ?, ?)",
+            (
+                (idx, _text(link.get("source")), _text(link.get("target")), json.dumps(link, ensure_ascii=False))
+                for idx, link in enumerate(links)
+            ),
+        )
+        con.execute("INSERT INTO label_fts (label_fts) VALUES ('rebuild')")
+
+        summaries: dict[str, list[str]] = {}
+        for link in links:
+            summary = link.get("summary")
+            if isinstance(summary, str):
+                for end in {_text(link.get("source")), _text(link.get("target"))} - {None}:
+                    summaries.setdefault(end, []).append(summary)
+        con.executemany(
+            "INSERT INTO text_fts (rowid, label, description, summaries) VALUES (?, ?, ?, ?)",
+            (
+                (pos, _text(node.get("label")), _text(node.get("description")), "\n".join(summaries.get(node.get("id"), ())))
+                for pos, node in enumerate(nodes)
+            ),
+        )
+        con.executescript(INDEXES)
+        con.executemany(
+            "INSERT INTO meta (key, value) VALUES (?, ?)",
+            (("version", version), ("schema", SCHEMA_VERSION), ("top_level", json.dumps(top_level(data), ensure_ascii=False))),
+        )
+        con.commit()
+        con.execute("VACUUM")
+    finally:
+        con.close()
+    os.replace(tmp, target)
+
+
+def connect(path: Path) -> sqlite3.Connection:
+    return sqlite3.connect(f"{path.resolve().as_uri()}?mode=ro", uri=True, check_same_thread=False)
+
+
+def read_version(path: Path) -> str:
+    con = connect(path)
+    try:
+        (version,) = con.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+    finally:
+        con.close()
+    return version
+
+
+def read_data(path: Path) -> dict:
+    con = connect(path)
+    try:
+        (top,) = con.execute("SELECT value FROM meta WHERE key = 'top_level'").fetchone()
+        return with_records(
+            json.loads(top),
+            [json.loads(record) for (record,) in con.execute("SELECT record FROM nodes ORDER BY pos")],
+            [json.loads(record) for (record,) in con.execute("SELECT record FROM links ORDER BY idx")],
+        )
+    finally:
+        con.close()
+
+
+def text_query(q: str) -> str | None:
+    """Every word of ``q`` as a prefix term, so partially typed words match."""
+    words = re.findall(r"\w+", q.lower())
+    return " ".join(f'"{word}"*' for word in words) or None
+
+
+def check_schema(path: Path) -> None:
+    """Raise if ``path`` is missing or was written with another table layout."""
+    if not path.exists():
+        raise FileNotFoundError(f"SQLite database not found: {path} (build it with compile_dataset.py)")
+    con = connect(path)
+    try:
+        row = con.execute("SELECT value FROM meta WHERE key = 'schema'").fetchone()
+    finally:
+        con.close()
+    if row is None or row[0] != SCHEMA_VERSION:
+        raise RuntimeError(f"{path} uses an older table layout; rebuild it with compile_dataset.py")
+
+
+class SqliteGraph:
+    """Indexed queries against a dataset database; one connection per thread.
+
+    While the file is missing every query answers as for an empty graph,
+    like the snapshot endpoints do.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._local = threading.local()
+
+    @property
+    def con(self) -> sqlite3.Connection | None:
+        # Reopen when the file was replaced; an open connection keeps reading the old one.
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            identity = None
+        else:
+            identity = (stat.st_ino, stat.st_mtime_ns)
+        if getattr(self._local, "identity", None) != identity:
+            if getattr(self._local, "con", None) is not None:
+                self._local.con.close()
+            self._local.con = None if identity is None else connect(self.path)
+            self._local.identity = identity
+        return getattr(self._local, "con", None)
+
+    def node_details(self, node_id: str) -> dict | None:
+        con = self.con
+        if con is None:
+            return None
+        row = con.execute("SELECT record FROM nodes WHERE id = ? ORDER BY pos LIMIT 1", (node_id,)).fetchone()
+        if row is None:
+            return None
+        links = con.execute(
+            "SELECT idx, record FROM links WHERE source = ? UNION SELECT idx, record FROM links WHERE target = ? ORDER BY idx",
+            (node_id, node_id),
+        )
+        return {"node": json.loads(row[0]), "links": [json.loads(record) for _, record in links]}
+
+    def search(
+        self,
+        q: str,
+        limit: int | None = None,
+        offset: int = 0,
+        node_type: str | None = None,
+        group: str | None = None,
+    ) -> tuple[list[dict], int]:
+        """One page of matching nodes and the total.
+
+        Same contract as SearchIndex.search: nodes whose normalized label
+        contains the normalized ``q``, exact matches first, then prefix
+        matches, then the rest, each by label length and dataset order.
+        """
+        con = self.con
+        if con is None:
+            return [], 0
+        q = normalize(q)
+        where, params = ["instr(n.search_label, ?) > 0"], [q]
+        if len(q) >= MIN_TRIGRAM_QUERY:
+            # Candidates from the trigram index; instr() keeps the match exact.
+            where.append("n.pos IN (SELECT rowid FROM label_fts WHERE label_fts MATCH ?)")
+            params.append('"%s"' % q.replace('"', '""'))
+        if node_type is not None:
+            where.append("n.type = ?")
+            params.append(node_type)
+        if group is not None:
+            where.append('n."group" = ?')
+            params.append(group)
+        clause = " AND ".join(where)
+
+        (total,) = con.execute(f"SELECT count(*) FROM nodes n WHERE {clause}", params).fetchone()
+        rows = con.execute(
+            f"SELECT n.record FROM nodes n WHERE {clause} "
+            "ORDER BY n.search_label = ? DESC, substr(n.search_label, 1, length(?)) = ? DESC, length(n.search_label), n.pos "
+            "LIMIT ? OFFSET ?",
+            [*params, q, q, q, -1 if limit is None else limit, offset],
+        )
+        return [json.loads(record) for (record,) in rows], total
+
+    def text_search(
+        self,
+        q: str,
+        limit: int | None = None,
+        offset: int = 0,
+        node_type: str | None = None,
+        group: str | None = None,
+    ) -> tuple[list[dict], int]:
+        """One page of nodes whose label, description or link summaries
+        contain every word of ``q`` (the last one possibly unfinished), and
+        the total. Exact label matches come first, then labels starting with
+        ``q``, then the rest by rank (labels weigh most, summaries least).
+        """
+        con = self.con
+        match = text_query(q)
+        if con is None or match is None:
+            return [], 0
+        where, params = ["text_fts MATCH ?"], [match]
+        if node_type is not None:
+            where.append("n.type = ?")
+            params.append(node_type)
+        if group is not None:
+            where.append('n."group" = ?')
+            params.append(group)
+        clause = " AND ".join(where)
+        source = "text_fts JOIN nodes n ON n.pos = text_fts.rowid"
+        q = normalize(q)
+
+        (total,) = con.execute(f"SELECT count(*) FROM {source} WHERE {clause}", params).fetchone()
+        rows = con.execute(
+            f"SELECT n.record FROM {source} WHERE {clause} "
+            f"ORDER BY n.search_label = ? DESC, substr(n.search_label, 1, length(?)) = ? DESC, {TEXT_RANK}, n.pos "
+            "LIMIT ? OFFSET ?",
+            [*params, q, q, q, -1 if limit is None else limit, offset],
+        )
+        return [json.loads(record) for (record,) in rows], total
@@ -0,0 +1,99 @@
+"""Dashboard aggregates, accumulated in one pass while a snapshot is built."""
+import math
+from collections import Counter
+from decimal import ROUND_HALF_UP, Decimal
+
+from citations import count_papers
+from graph_index import GraphIndex
+
+TOP_CONNECTED = 8
+
+
+def js_round(value: float) -> int:
+    """Math.round: the nearest integer, halves rounded up."""
+    floor = math.floor(value)
+    # value - floor is exact, unlike value + 0.5, which can round up a value just below a half.
+    return floor + (value - floor >= 0.5)
+
+
+def percent(part: int, whole: int) -> int:
+    # Math.round((part / whole) * 100), as on the dashboard, in the same order:
+    # part * 100 / whole rounds differently (23/40 is 57 there, not 58).
+    return js_round(part / whole * 100) if whole else 0
+
+
+def ratio(part: int, whole: int) -> float:
+    # Number.prototype.toFixed(1) semantics, as on the dashboard: the exact
+    # value of the quotient, halves rounded up (round() rounds them to even).
+    return float(Decimal(part / whole).quantize(Decimal("0.1"), ROUND_HALF_UP)) if whole else 0.0
+
+
+class StatsAccumulator:
+    def __init__(self):
+        self.type_counts = Counter()
+        self.groups: dict[str, set] = {"food": set(), "biomarker": set()}
+        self.nodes_by_type: dict[str, list] = {"food": [], "biomarker": []}
+        self.link_count = 0
+        self.high_strength = 0
+        self.links_with_citations = 0
+        self.paper_titles = set()
+        self.out_degree = Counter()
+        self.in_degree = Counter()
+
+    def add_node(self, node: dict) -> None:
+        node_type = node.get("type")
+        self.type_counts[node_type] += 1
+        if node_type in self.groups:
+            self.groups[node_type].add(node.get("group"))
+            self.nodes_by_type[node_type].append(node)
+
+    def add_link(self, strength, titles: tuple, source, target) -> None:
+        """Count one link from its fields; ``titles`` are its citations' titles."""
+        self.link_count += 1
+        if strength == "high":
+            self.high_strength += 1
+        if titles:
+            self.links_with_citations += 1
+            self.paper_titles.update(titles)
+        self.out_degree[source] += 1
+        self.in_degree[target] += 1
+
+    def _top(self, node_type: str, degree: Counter) -> list[dict]:
+        ranked = sorted(self.nodes_by_type[node_type], key=lambda node: -degree[node.get("id")])
+        return [
+            {"id": node.get("id"), "label": node.get("label"), "group": node.get("group"), "count": degree[node.get("id")]}
+            for node in ranked[:TOP_CONNECTED]
+        ]
+
+    def result(self) -> dict:
+        foods = self.type_counts["food"]
+        biomarkers = self.type_counts["biomarker"]
+        links = self.link_count
+        return {
+            "foods": foods,
+            "biomarkers": biomarkers,
+            "links": links,
+            "papers": len(self.paper_titles),
+            "high_strength": self.high_strength,
+            "evidence_ratio": percent(self.high_strength, links),
+            "citation_coverage": percent(self.links_with_citations, links),
+            "food_groups": len(self.groups["food"]),
+            "biomarker_groups": len(self.groups["biomarker"]),
+            "avg_links_per_food": ratio(links, foods),
+            "avg_links_per_biomarker": ratio(links, biomarkers),
+            "top_foods": self._top("food", self.out_degree),
+            "top_biomarkers": self._top("biomarker", self.in_degree),
+        }
+
+
+def compute_stats(index: GraphIndex) -> dict:
+    stats = StatsAccumulator()
+    for node in index.nodes:
+        stats.add_node(node)
+    # Link fields are read per column rather than per decoded record.
+    citations = index.link_citations("doi", "title")
+    for strength, cited, source, target in zip(
+        index.link_values("strength"), citations, index.link_values("source"), index.link_values("target")
+    ):
+        stats.add_link(strength, tuple(title for _, title in cited) if isinstance(cited, tuple) else (), source, target)
+    return {**stats.result(), "distinct_citations": count_papers(citations)}
@@ -0,0 +1,318 @@
+"""Storage backends behind the API, selected with ``STORAGE_BACKEND``.
+
+``json`` (the default) serves the dataset file at DATA_PATH, JSON or a
+compiled snapshot, entirely from memory. ``sqlite`` serves the database at
+SQLITE_PATH (see sqlite_store.py): node lookups and search are indexed SQL
+queries, while whole-graph endpoints (graph, stats, recommendations, papers,
+subgraphs) use a snapshot loaded from the same database on first use. ``neo4j`` queries
+the graph seeded by seed_db.py (see neo4j_store.py) and only serves the
+graph, search, node and subgraph endpoints.
+
+The snapshot backends keep their snapshot in a GraphStore, and every method
+that may touch disk or build an index runs in the store's executor.
+"""
+import abc
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from citations import CitationTable
+from encoded_payload import EncodedPayload
+from graph_store import BASE_DIR, RELOAD_CHECK_INTERVAL, GraphSnapshot, GraphStore, executor, read_source, resolve_data_path
+from search_index import normalize
+from sqlite_store import SqliteGraph, check_schema
+
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "json")
+
+logger = logging.getLogger(__name__)
+
+
+class Unsupported(Exception):
+    """The configured backend cannot serve this endpoint."""
+
+
+def field_filter(**allowed):
+    """Predicate accepting records whose fields are in the given value lists."""
+    allowed = {key: set(values) for key, values in allowed.items() if values}
+    if not allowed:
+        return None
+    return lambda record: all(record.get(key) in values for key, values in allowed.items())
+
+
+def _warmed(future) -> None:
+    if future.exception() is not None:
+        # Requests still build whatever is missing on first use.
+        logger.error("Snapshot warm-up failed", exc_info=future.exception())
+
+
+class Storage(abc.ABC):
+    def __init__(self, store: GraphStore | None):
+        self.store = store
+
+    async def start(self) -> None:
+        # Load the dataset once at startup, then build its indexes in the
+        # background so the worker can start serving (from a compiled snapshot) right away.
+        loop = asyncio.get_running_loop()
+        snapshot = await loop.run_in_executor(executor, lambda: self.store.reload(warm=False))
+        executor.submit(snapshot.warm).add_done_callback(_warmed)
+
+    async def close(self) -> None:
+        pass
+
+    async def snapshot(self) -> GraphSnapshot:
+        """The current snapshot, loaded in the executor if there is none yet."""
+        if self.store.snapshot is None:
+            return await asyncio.get_running_loop().run_in_executor(executor, lambda: self.store.reload(warm=False))
+        return self.store.get()
+
+    async def derived(self, name: str):
+        """A derived attribute of the current snapshot, built in the executor if
+        it isn't yet, so a first build never runs on (or blocks) the event loop."""
+        snapshot = await self.snapshot()
+        if snapshot.built(name):
+            return getattr(snapshot, name)
+        return await asyncio.get_running_loop().run_in_executor(executor, getattr, snapshot, name)
+
+    async def graph_payload(self, citations: str) -> EncodedPayload:
+        return await self.derived("normalized_payload" if citations == "normalized" else "graph_payload")
+
+    async def subgraph(self, seeds, depth, max_nodes, node_filters, link_filters) -> dict | None:
+        """Nodes within ``depth`` hops of the seeds and the links between them,
+        or None when no seed exists. The filters map field names to allowed values."""
+        index = await self.derived("index")
+        if not any(index.node(node_id) for node_id in seeds):
+            return None
+        positions, link_ids, truncated = index.neighborhood(
+            seeds,
+            depth,
+            max_nodes,
+            node_filter=field_filter(**node_filters),
+            link_filter=field_filter(**link_filters),
+        )
+        return {
+            "nodes": [index.nodes[pos] for pos in positions],
+            "links": [index.links[link_idx] for link_idx in link_ids],
+            "truncated": truncated,
+        }
+
+    @abc.abstractmethod
+    async def node_details(self, node_id: str) -> dict | None:
+        """The node and every link touching it, in dataset order."""
+
+    @abc.abstractmethod
+    async def search(self, q: str, limit: int, offset: int, node_type: str | None, group: str | None) -> tuple[list[dict], int]:
+        """One page of nodes matching ``q`` and the total number of matches."""
+
+    async def text_search(self, q: str, limit: int, offset: int, node_type: str | None, group: str | None) -> tuple[list[dict], int]:
+        """Like search(), but over labels, descriptions and link summaries."""
+        raise Unsupported("Full-text search needs STORAGE_BACKEND=sqlite")
+
+
+class JsonStorage(Storage):
+    async def node_details(self, node_id: str) -> dict | None:
+        index = await self.derived("index")
+        node = index.node(node_id)
+        if not node:
+            return None
+        return {"node": node, "links": index.node_links(node_id)}
+
+    async def search(self, q, limit, offset, node_type, group):
+        return (await self.derived("search")).search(q, limit=limit, offset=offset, node_type=node_type, group=group)
+
+
+class SqliteStorage(Storage):
+    """Node lookups and search query the database; the snapshot behind the
+    whole-graph endpoints is only loaded when one of them is first called."""
+
+    # Search and node lookups never read the snapshot's index or search.
+    PREBUILD = ("graph_payload", "recommender", "papers", "stats_payload")
+
+    def __init__(self, path: Path, on_load=None):
+        super().__init__(GraphStore(lambda: path if path.exists() else None, on_load=on_load, prebuild=self.PREBUILD))
+        self.graph = SqliteGraph(path)
+
+    async def start(self) -> None:
+        # Fail now rather than on the first request if the database is missing or outdated.
+        check_schema(self.graph.path)
+
+    async def _query(self, method, *args):
+        return await asyncio.get_running_loop().run_in_executor(executor, method, *args)
+
+    async def node_details(self, node_id: str) -> dict | None:
+        return await self._query(self.graph.node_details, node_id)
+
+    async def search(self, q, limit, offset, node_type, group):
+        return await self._query(self.graph.search, q, limit, offset, node_type, group)
+
+    async def text_search(self, q, limit, offset, node_type, group):
+        return await self._query(self.graph.text_search, q, limit, offset, node_type, group)
+
+
+class Neo4jStorage(Storage):
+    """Queries a Neo4j graph through a runner from neo4j_store.py.
+
+    Results are kept in an LRU cache that is emptied whenever the graph's
+    dataset version changes; the version is checked at most once every
+    ``check_interval`` seconds.
+    """
+
+    def __init__(self, runner, cache_size: int = 256, check_interval: float = RELOAD_CHECK_INTERVAL):
+        super().__init__(None)
+        self.runner = runner
+        self.cache_size = cache_size
+        self.check_interval = check_interval
+        self.version = None
+        self._cache: OrderedDict = OrderedDict()
+        self._checked_at = 0.0
+
+    async def start(self) -> None:
+        await self.runner.start()
+        await self._check_version()
+
+    async def close(self) -> None:
+        await self.runner.close()
+
+    async def snapshot(self) -> GraphSnapshot:
+        raise Unsupported("Not available with STORAGE_BACKEND=neo4j")
+
+    async def derived(self, name: str):
+        raise Unsupported("Not available with STORAGE_BACKEND=neo4j")
+
+    async def _check_version(self) -> None:
+        self._checked_at = time.monotonic()
+        rows = await self.runner.run("version")
+        version = rows[0]["version"] if rows else None
+        if version != self.version:
+            self._cache.clear()
+            self.version = version
+
+    async def _cached(self, key: tuple, compute):
+        if time.monotonic() - self._checked_at >= self.check_interval:
+            await self._check_version()
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+        version = self.version
+        value = await compute()
+        # Don't cache a result computed while the version changed underneath.
+        if version == self.version and self.cache_size > 0:
+            self._cache[key] = value
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return value
+
+    async def _records(self, name: str, **params) -> list[dict]:
+        return [json.loads(row["record"]) for row in await self.runner.run(name, **params)]
+
+    async def graph_payload(self, citations: str) -> EncodedPayload:
+        async def compute():
+            nodes = await self._records("nodes")
+            links = await self._records("links")
+            if citations == "normalized":
+                build = lambda: EncodedPayload.from_json(CitationTable(links).normalized(nodes, links))
+            else:
+                build = lambda: EncodedPayload.from_json({"nodes": nodes, "links": links})
+            return await asyncio.get_running_loop().run_in_executor(executor, build)
+
+        return await self._cached(("graph", citations), compute)
+
+    async def node_details(self, node_id: str) -> dict | None:
+        async def compute():
+            rows = await self.runner.run("lookup", ids=[node_id])
+            if not rows:
+                return None
+            return {"node": json.loads(rows[0]["record"]), "links": await self._records("node_links", id=node_id)}
+
+        return await self._cached(("node", node_id), compute)
+
+    async def search(self, q, limit, offset, node_type, group):
+        async def compute():
+            (row,) = await self.runner.run(
+                "search", q=normalize(q), limit=limit, offset=offset, type=node_type, group=group
+            )
+            return [json.loads(record) for record in row["page"]], row["total"]
+
+        return await self._cached(("search", normalize(q), limit, offset, node_type, group), compute)
+
+    async def subgraph(self, seeds, depth, max_nodes, node_filters, link_filters):
+        async def compute():
+            return await self._subgraph(seeds, depth, max_nodes, node_filters, link_filters)
+
+        key = ("subgraph", tuple(seeds), depth, max_nodes, *(
+            (name, tuple(values) if values else None)
+            for name, values in sorted({**node_filters, **link_filters}.items())
+        ))
+        return await self._cached(key, compute)
+
+    async def _subgraph(self, seeds, depth, max_nodes, node_filters, link_filters):
+        # The same breadth-first walk as GraphIndex.neighborhood, one query per hop.
+        node_filter = field_filter(**node_filters)
+        found = {row["id"]: json.loads(row["record"]) for row in await self.runner.run("lookup", ids=list(dict.fromkeys(seeds)))}
+        if not found:
+            return None
+        selected: dict[str, dict] = {}
+        for seed in seeds:
+            if seed in found and seed not in selected and len(selected) < max_nodes:
+                selected[seed] = found[seed]
+
+        link_params = {key: list(values) if values else None for key, values in (("effects", link_filters.get("effect")), ("strengths", link_filters.get("strength")))}
+        frontier = list(selected)
+        truncated = False
+        for _ in range(depth):
+            if not frontier or truncated:
+                break
+            neighbors: dict[str, list] = {node_id: [] for node_id in frontier}
+            for row in await self.runner.run("expand", ids=frontier, **link_params):
+                neighbors[row["id"]].append(row)
+            frontier = []
+            for node_id in neighbors:
+                for row in neighbors[node_id]:
+                    other = row["other"]
+                    if other in selected:
+                        continue
+                    record = json.loads(row["record"])
+                    if node_filter is not None and not node_filter(record):
+                        continue
+                    if len(selected) >= max_nodes:
+                        truncated = True
+                        break
+                    selected[other] = record
+                    frontier.append(other)
+                if truncated:
+                    break
+
+        links = await self._records("induced", ids=list(selected), **link_params)
+        return {"nodes": list(selected.values()), "links": links, "truncated": truncated}
+
+
+def create_neo4j_runner():
+    """``NEO4J_URI=standin:<dataset path>`` serves a dataset file through the
+    in-memory stand-in instead of a server (for tests and local runs)."""
+    from neo4j_store import Neo4jRunner, StandInRunner
+
+    uri = os.getenv("NEO4J_URI", "bolt://localhost:7687")
+    if uri.startswith("standin:"):
+        path = Path(uri.removeprefix("standin:")).expanduser() if uri != "standin:" else resolve_data_path()
+        version, load = read_source(path)
+        return StandInRunner(load(None).data, version)
+    return Neo4jRunner(
+        uri,
+        (os.getenv("NEO4J_USER", "neo4j"), os.getenv("NEO4J_PASSWORD", "password")),
+        pool_size=int(os.getenv("NEO4J_POOL_SIZE", "50")),
+        database=os.getenv("NEO4J_DATABASE") or None,
+    )
+
+
+def create_storage(on_load=None) -> Storage:
+    if STORAGE_BACKEND == "json":
+        return JsonStorage(GraphStore(on_load=on_load))
+    if STORAGE_BACKEND == "sqlite":
+        path = Path(os.getenv("SQLITE_PATH") or BASE_DIR / "data" / "mvp_dataset.sqlite3").expanduser()
+        return SqliteStorage(path, on_load=on_load)
+    if STORAGE_BACKEND == "neo4j":
+        return Neo4jStorage(create_neo4j_runner(), cache_size=int(os.getenv("NEO4J_CACHE_SIZE", "256")))
+    raise ValueError(f"Unknown STORAGE_BACKEND: {STORAGE_BACKEND!r} (expected 'json', 'sqlite' or 'neo4j')")
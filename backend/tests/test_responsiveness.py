@@ -0,0 +1,11 @@
+import asyncio
+from argparse import Namespace
+
+from benchmarks import responsiveness
+
+
+def test_reload_keeps_the_event_loop_responsive(capsys):
+    # The same check as ``python -m benchmarks.responsiveness``, at the size
+    # the README quotes; its report is printed if this fails.
+    args = Namespace(links=100000, max_lag_ms=100.0, max_handler_s=1.0, timeout=300.0)
+    assert asyncio.run(responsiveness.check(args)), capsys.readouterr().out
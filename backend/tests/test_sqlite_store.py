@@ -0,0 +1,46 @@
+from sqlite_store import SqliteGraph, write_database
+
+DATA = {
+    "nodes": [
+        {"id": "food-1", "label": "Oats", "type": "food", "description": "A whole grain."},
+        {"id": "food-2", "label": "Oat Milk", "type": "food", "description": "A plant-based drink."},
+        {"id": "bio-1", "label": "LDL Cholesterol", "type": "biomarker", "description": "Low-density lipoprotein."},
+        {"id": "bio-2", "label": "Glucose", "type": "biomarker"},
+    ],
+    "links": [
+        {"source": "food-1", "target": "bio-1", "summary": "Beta-glucan fiber binds bile acids."},
+    ],
+}
+
+
+def graph(tmp_path) -> SqliteGraph:
+    path = tmp_path / "dataset.sqlite3"
+    write_database(DATA, "0" * 64, path)
+    return SqliteGraph(path)
+
+
+def labels(result):
+    nodes, total = result
+    return [node["label"] for node in nodes], total
+
+
+def test_label_search_matches_label_substrings_only(tmp_path):
+    assert labels(graph(tmp_path).search("oat")) == (["Oats", "Oat Milk"], 2)
+    assert labels(graph(tmp_path).search("fiber")) == ([], 0)
+
+
+def test_text_search_covers_descriptions_and_summaries(tmp_path):
+    db = graph(tmp_path)
+    # Both ends of the link carry its summary; the last word may be unfinished.
+    assert labels(db.text_search("bile ac")) == (["Oats", "LDL Cholesterol"], 2)
+    assert labels(db.text_search("lipoprotein")) == (["LDL Cholesterol"], 1)
+    assert labels(db.text_search("plant")) == (["Oat Milk"], 1)
+    assert labels(db.text_search("fiber", node_type="biomarker")) == (["LDL Cholesterol"], 1)
+
+
+def test_text_search_ranks_label_matches_first(tmp_path):
+    assert labels(graph(tmp_path).text_search("oat")) == (["Oat Milk", "Oats"], 2)
+
+
+def test_text_search_without_words_matches_nothing(tmp_path):
+    assert labels(graph(tmp_path).text_search("!!")) == ([], 0)
@@ -0,0 +1,21 @@
+import pytest
+
+from stats import percent, ratio
+
+
+# Expected values are what the dashboard shows: Math.round((part / whole) * 100)
+# and (part / whole).toFixed(1) in a browser.
+@pytest.mark.parametrize(
+    "part, whole, expected",
+    [(23, 40, 57), (46, 80, 57), (29, 200, 14), (113, 200, 56), (1, 2, 50), (1, 8, 13), (0, 7, 0), (7, 7, 100), (3, 0, 0)],
+)
+def test_percent_matches_math_round(part, whole, expected):
+    assert percent(part, whole) == expected
+
+
+@pytest.mark.parametrize(
+    "part, whole, expected",
+    [(5, 4, 1.3), (3, 20, 0.1), (1, 20, 0.1), (7, 4, 1.8), (10, 3, 3.3), (4, 0, 0.0)],
+)
+def test_ratio_matches_to_fixed(part, whole, expected):
+    assert ratio(part, whole) == expected